@@ -0,0 +1,200 @@
+"""Replay a message corpus through AutoMod without connecting to Discord.
+
+Reports messages per second through the whole AutoMod stage, p50/p99
+latency of each check and memory use, for several filter-list sizes.
+Messages arrive on a simulated clock, so the rate checks see a realistic
+pace however fast the replay runs. Every punishment is set to delete and
+the stub objects make no requests.
+
+Run from the repository root:
+    python benchmarks/automod_replay.py [messages] [corpus.txt]
+
+A corpus file has one message per line; without one, synthetic chat is
+generated with some filtered words, invites, mentions and copy-paste spam
+mixed in.
+"""
+import asyncio
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.automod import AutoMod
+from utils.pipeline import MessageContext
+from utils.storage import Storage
+
+SIZES = [10, 100, 1000, 5000]
+AUTHORS = 500
+MESSAGES_PER_SECOND = 50  # Simulated guild traffic
+
+
+class StubChannel:
+    id = 1
+
+    async def send(self, *args, **kwargs):
+        pass
+
+    async def delete_messages(self, messages, reason=None):
+        pass
+
+
+CHANNEL = StubChannel()
+
+
+class StubGuild:
+    id = 1
+    name = "Benchmark"
+
+    def get_channel(self, channel_id):
+        return CHANNEL
+
+
+class StubAuthor:
+    bot = False
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+
+    async def send(self, *args, **kwargs):
+        pass
+
+
+class StubMessage:
+    def __init__(self, guild, author, content, mentions):
+        self.guild = guild
+        self.author = author
+        self.content = content
+        self.mentions = mentions
+        self.channel = CHANNEL
+
+    async def delete(self):
+        pass
+
+
+async def fetch_invite(code):
+    return SimpleNamespace(guild=SimpleNamespace(id=hash(code) % 1000, name=f"Server {code}"))
+
+
+def random_word(length):
+    return "".join(random.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def synthetic_corpus(count, words):
+    vocabulary = [random_word(random.randint(2, 8)) for _ in range(2000)]
+    spam = "free nitro for everyone who clicks the link in my bio before midnight"
+    corpus = []
+    for _ in range(count):
+        content = " ".join(random.choice(vocabulary) for _ in range(random.randint(3, 20)))
+        roll = random.random()
+        if roll < 0.01:
+            content += " " + random.choice(words)
+        elif roll < 0.02:
+            content += f" discord.gg/{random_word(8)}"
+        elif roll < 0.04:
+            content = spam + "!" * random.randint(0, 3)
+        corpus.append((content, random.randint(1, 4) if roll > 0.95 else 0))
+    return corpus
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+async def replay(storage, corpus, words, trace=False):
+    bot = SimpleNamespace(storage=storage, fetch_invite=fetch_invite, wait_until_ready=None)
+    cog = AutoMod(bot)
+    config = await cog.get_guild_config(StubGuild.id)
+    config["enabled"] = True
+    config["word_filter"]["filtered_words"] = words
+    # Off by default, the corpus includes copy-paste spam for it
+    config["duplicate_filter"]["enabled"] = True
+    for section in config.values():
+        if isinstance(section, dict) and "punishment" in section:
+            section["punishment"] = "delete"
+
+    # Time every check on its own
+    timings = {name: [] for name in cog.checks}
+
+    def timed(name, check):
+        async def run(ctx, section):
+            start = time.perf_counter()
+            try:
+                return await check(ctx, section)
+            finally:
+                timings[name].append(time.perf_counter() - start)
+        return run
+
+    if not trace:
+        cog.checks = {name: timed(name, check) for name, check in cog.checks.items()}
+
+    guild = StubGuild()
+    authors = [StubAuthor(user_id) for user_id in range(1, AUTHORS + 1)]
+    messages = [
+        StubMessage(guild, random.choice(authors), content, random.sample(authors, mentions))
+        for content, mentions in corpus
+    ]
+
+    if trace:
+        tracemalloc.start()
+    stopped = 0
+    start = time.perf_counter()
+    for index, message in enumerate(messages):
+        ctx = MessageContext(message)
+        ctx.now = index / MESSAGES_PER_SECOND
+        await cog.check_message(ctx)
+        stopped += ctx.stopped_by is not None
+    elapsed = time.perf_counter() - start
+
+    memory = None
+    if trace:
+        memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    await cog.punishments.stop()
+    await cog.log_digest.stop()
+    return len(messages) / elapsed, stopped, timings, memory
+
+
+async def run(count, corpus_file):
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as directory:
+        storage = Storage(os.path.join(directory, "bench.db"))
+        try:
+            print(f"{'words':>6} {'msg/s':>9} {'caught':>7} {'check':>17} {'p50 us':>8} {'p99 us':>8} "
+                  f"{'retained KiB':>13} {'peak KiB':>9}")
+            for size in SIZES:
+                words = list({random_word(random.randint(4, 10)) for _ in range(size)})
+                if corpus_file:
+                    with open(corpus_file, encoding="utf-8") as f:
+                        corpus = [(line.rstrip("\n"), 0) for line in f if line.strip()][:count]
+                else:
+                    corpus = synthetic_corpus(count, words)
+
+                rate, stopped, timings, _ = await replay(storage, corpus, words)
+                # Allocations are measured in a separate run, tracing slows everything down
+                _, _, _, (retained, peak) = await replay(storage, corpus, words, trace=True)
+
+                for index, (name, samples) in enumerate(timings.items()):
+                    prefix = (f"{size:>6} {rate:>9.0f} {stopped:>7}" if index == 0 else " " * 24)
+                    suffix = f" {retained / 1024:>13.0f} {peak / 1024:>9.0f}" if index == 0 else ""
+                    print(f"{prefix} {name:>17} {percentile(samples, 0.5) * 1e6:>8.1f} "
+                          f"{percentile(samples, 0.99) * 1e6:>8.1f}{suffix}")
+        finally:
+            await storage.close()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus_file = sys.argv[2] if len(sys.argv) > 2 else None
+    asyncio.run(run(count, corpus_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare the memory used by level records as per-user dicts and as columns.
+
+Run from the repository root: python benchmarks/levels_memory.py [users]
+"""
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.leveldata import GuildLevels
+
+
+def make_rows(count):
+    # Snowflake-sized IDs and realistic values, encoded as in the database
+    random.seed(1)
+    return [
+        (str(random.randint(10**17, 10**18)), json.dumps({
+            "xp": random.randint(0, 500000),
+            "level": random.randint(0, 50),
+            "last_message": random.uniform(1.6e9, 1.7e9)
+        }))
+        for _ in range(count)
+    ]
+
+
+def load(rows):
+    # What Repository.load_scope() hands to the cache
+    return {key: json.loads(value) for key, value in rows}
+
+
+def measure(build, rows):
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = build(rows)
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, size
+
+
+def as_dicts(rows):
+    # The previous layout: the loaded dicts were kept as they are
+    return load(rows)
+
+
+def as_columns(rows):
+    return GuildLevels.from_records(load(rows))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(count)
+
+    _, dict_size = measure(as_dicts, rows)
+    _, column_size = measure(as_columns, rows)
+
+    print(f"Users:          {count}")
+    print(f"Dict records:   {dict_size / count:.1f} bytes/user ({dict_size / 1024 / 1024:.1f} MiB)")
+    print(f"Column records: {column_size / count:.1f} bytes/user ({column_size / 1024 / 1024:.1f} MiB)")
+    print(f"Saved:          {(dict_size - column_size) / count:.1f} bytes/user "
+          f"({(1 - column_size / dict_size) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
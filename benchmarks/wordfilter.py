@@ -0,0 +1,59 @@
+"""Compare the old per-word filter loop with the compiled WordMatcher.
+
+Run from the repository root: python benchmarks/wordfilter.py [messages]
+"""
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.wordfilter import WordMatcher
+
+SIZES = [10, 100, 1000, 5000]
+
+
+def random_word(length):
+    return "".join(random.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def old_filter(words, content):
+    # The filter as it used to run: one re.search per word
+    for word in words:
+        if re.search(r'\b' + re.escape(word.lower()) + r'\b', content):
+            return word
+    return None
+
+
+def throughput(check, messages):
+    start = time.perf_counter()
+    for content in messages:
+        check(content)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    random.seed(1)
+    # Ordinary chat, so most messages contain none of the words
+    messages = [" ".join(random_word(random.randint(2, 8)) for _ in range(15)) for _ in range(count)]
+
+    print(f"{'words':>6} {'old msg/s':>12} {'compiled msg/s':>15} {'speedup':>8} {'compile ms':>11}")
+    for size in SIZES:
+        words = list({random_word(random.randint(4, 10)) for _ in range(size)})
+
+        start = time.perf_counter()
+        matcher = WordMatcher(words)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        # The old loop is slow with long lists, a sample is enough
+        old = throughput(lambda content: old_filter(words, content), messages[:max(20, count * 10 // size)])
+        new = throughput(matcher.search, messages)
+        print(f"{size:>6} {old:>12.0f} {new:>15.0f} {new / old:>7.0f}x {compile_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 import logging
+from utils.mutedrole import MutedRoles
+from utils.pipeline import MessagePipeline
+from utils.storage import Storage
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,6 +22,16 @@ intents.members = True
 intents.message_content = True
 bot = commands.Bot(command_prefix=DEFAULT_PREFIX, intents=intents)
 
+# Shared database used by every cog
+bot.storage = Storage("data/bot.db")
+
+# Cogs handle messages as stages of one pipeline instead of separate listeners
+bot.pipeline = MessagePipeline()
+bot.add_listener(bot.pipeline.process, "on_message")
+
+# Muted role setup shared by Moderation and AutoMod
+bot.muted_roles = MutedRoles()
+
 # Load cogs
 async def load_extensions():
     for filename in os.listdir('./cogs'):
@@ -61,9 +74,12 @@ async def on_error(event, *args, **kwargs):
     logging.error(f"Event error in {event}", exc_info=True)
 
 async def main():
-    async with bot:
-        await load_extensions()
-        await bot.start(TOKEN)
+    try:
+        async with bot:
+            await load_extensions()
+            await bot.start(TOKEN)
+    finally:
+        await bot.storage.close()
 
 if __name__ == "__main__":
     import asyncio
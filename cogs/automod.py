@@ -1,106 +1,228 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
+from utils.announcements import AnnouncementQueue
+from utils.automodconfig import GuildConfig, default_config
+from utils.guildcache import GuildCache
+from utils.fingerprints import FingerprintStore, Fingerprinter
+from utils.invitecache import InviteCache
+from utils.punishments import PunishmentRegistry
+from utils.raids import RaidDetector
+from utils.scheduler import Scheduler
+from utils.slidingwindow import SlidingWindow
 import re
 import asyncio
-from collections import defaultdict, deque
+import time
 from datetime import datetime, timedelta
+from typing import Literal
+
+# Runs before every other message stage so it can stop them
+PIPELINE_PRIORITY = 10
+INVITE_PATTERN = re.compile(r'discord(?:\.gg|app\.com\/invite|\.com\/invite)\/([a-zA-Z0-9\-]{2,})')
+# Log actions arriving this close together are sent as one digest
+LOG_DIGEST_INTERVAL = 5
+LOG_DIGEST_MIN_GAP = 2
+LOG_DIGEST_MAX_ENTRIES = 25
+LOG_DIGEST_MAX_REASONS = 10
+LOG_DIGEST_MAX_USERS = 8
+# Raid members are dealt with in batches this many seconds apart
+RAID_ACTION_INTERVAL = 2
+RAID_CONCURRENCY = 5
+# Punishments that delete the message also delete the rest of the burst
+DELETING_PUNISHMENTS = ("delete", "mute", "timeout")
+BULK_DELETE_SIZE = 100
 
 class AutoMod(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config_file = "data/automod_config.json"
-        self.ensure_data_folder()
-        self.config = self.load_config()
-        
-        # Message tracking for anti-spam
-        self.user_message_times = defaultdict(lambda: deque(maxlen=10))
-        self.user_mention_counts = defaultdict(lambda: deque(maxlen=10))
-        
-        # Default bad words list (can be customized per server)
-        self.default_bad_words = [
-            "badword1", "badword2", "badword3"  # Replace with actual bad words
-        ]
-        
-    def ensure_data_folder(self):
-        if not os.path.exists("data"):
-            os.makedirs("data")
-        if not os.path.exists(self.config_file):
-            with open(self.config_file, "w") as f:
-                json.dump({}, f)
-                
-    def load_config(self):
-        try:
-            with open(self.config_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
+        self.legacy_file = "data/automod_config.json"
+        self.repo = bot.storage.repository("automod")
+        # Guild configs are loaded on first use and dropped again when idle
+        self.guilds = GuildCache(self.repo, on_evict=self.forget_guild)
+        # Compiled GuildConfig per guild, rebuilt when an admin changes a setting
+        self.configs = {}
+        # Shared by every guild that never changed a setting
+        self.default_config = GuildConfig.compile(default_config())
+        # Recent message fingerprints per guild, for copy-paste spam
+        self.fingerprinter = Fingerprinter()
+        self.fingerprints = {}
+        # Invite code lookups are cached instead of hitting the API per message
+        self.invites = InviteCache(self.bot.fetch_invite)
+        # Log channel messages, bursts of actions are merged into digests
+        self.log_digest = AnnouncementQueue(
+            self.log_message,
+            window=LOG_DIGEST_INTERVAL,
+            min_interval=LOG_DIGEST_MIN_GAP,
+            leading=True,
+            max_items=LOG_DIGEST_MAX_ENTRIES
+        )
+        # Timed punishments are stored so they expire even after a restart
+        self.scheduler = Scheduler(
+            bot.storage.repository("punishments"),
+            self.run_scheduled,
+            ready=self.bot.wait_until_ready
+        )
+        
+        # One punishment per member at a time, a burst of violations becomes one
+        self.punishments = PunishmentRegistry(self.clean_up_burst)
+        
+        # Join rates and raids per guild
+        self.raids = RaidDetector()
+        
+        # Message and mention rates per (guild_id, user_id) for anti-spam
+        self.message_rates = SlidingWindow()
+        self.mention_rates = SlidingWindow()
+        
+        # Message checks by config section
+        self.checks = {
+            "anti_spam": self.check_spam,
+            "anti_mention": self.check_mentions,
+            "word_filter": self.check_words,
+            "invite_filter": self.check_invites,
+            "duplicate_filter": self.check_duplicates
+        }
+        
+    async def cog_load(self):
+        # Move data over from the old JSON file on first run
+        await self.repo.import_legacy(
+            self.legacy_file,
+            lambda data: ((guild_id, "config", config) for guild_id, config in data.items())
+        )
+        self.guilds.start()
+        await self.scheduler.load()
+        self.scheduler.start()
+        self.bot.pipeline.add_stage("automod", self.check_message, PIPELINE_PRIORITY)
+        
+    async def cog_unload(self):
+        self.bot.pipeline.remove_stage("automod")
+        await self.scheduler.stop()
+        await self.punishments.stop()
+        await self.log_digest.stop()
+        for raid in self.raids.raids.values():
+            if raid.task:
+                raid.task.cancel()
+        await self.guilds.stop()
+        
+    def perf_stats(self):
+        stats = self.guilds.stats()
+        invites = self.invites.stats()
+        fingerprints = sum(len(store) for store in self.fingerprints.values())
+        log = self.log_digest.stats()
+        raids = self.raids.stats()
+        punishments = self.punishments.stats()
+        return (f"Guild configs in memory: {stats['guilds']} | Loads: {stats['loads']} | Evictions: {stats['evictions']}\n"
+                f"Rate tracking: {len(self.message_rates)} message keys | {len(self.mention_rates)} mention keys\n"
+                f"Message fingerprints: {fingerprints} in {len(self.fingerprints)} guilds\n"
+                f"Invite cache: {invites['size']} codes | Hits: {invites['hits']} | Misses: {invites['misses']} "
+                f"({invites['hit_rate']:.1f}% hit rate) | API fetches: {invites['fetches']}\n"
+                f"Scheduled unmutes: {len(self.scheduler)} pending | {self.scheduler.completed} done\n"
+                f"Punishments: {punishments['started']} | {punishments['collapsed']} repeat violations collapsed\n"
+                f"Log: {log['queued']} actions in {log['sent']} messages\n"
+                f"Raids: {raids['detected']} detected | {raids['active']} active")
             
-    def save_config(self):
-        with open(self.config_file, "w") as f:
-            json.dump(self.config, f, indent=4)
+    def forget_guild(self, guild_id):
+        self.configs.pop(guild_id, None)
+        self.fingerprints.pop(guild_id, None)
             
-    def get_guild_config(self, guild_id):
+    def save_config(self, guild_id):
+        # Queued and written on the storage thread
         guild_id = str(guild_id)
-        if guild_id not in self.config:
-            self.config[guild_id] = {
-                "enabled": False,
-                "log_channel": None,
-                "anti_spam": {
-                    "enabled": True,
-                    "max_messages": 5,  # Max messages in time frame
-                    "time_frame": 3,    # Time frame in seconds
-                    "punishment": "mute",
-                    "punishment_duration": 5  # Minutes
-                },
-                "anti_mention": {
-                    "enabled": True,
-                    "max_mentions": 5,  # Max mentions in a single message
-                    "punishment": "mute",
-                    "punishment_duration": 5  # Minutes
-                },
-                "word_filter": {
-                    "enabled": True,
-                    "filtered_words": self.default_bad_words,
-                    "punishment": "delete",  # delete, warn, mute, kick, ban
-                },
-                "invite_filter": {
-                    "enabled": True,
-                    "allowed_servers": [],  # List of allowed server IDs
-                    "punishment": "delete"
-                }
-            }
-            self.save_config()
-        return self.config[guild_id]
+        self.repo.save(guild_id, "config", self.guilds.get(guild_id)["config"])
+        self.configs.pop(guild_id, None)
             
-    async def log_action(self, guild, action, user, reason, duration=None):
-        config = self.get_guild_config(guild.id)
-        if not config["log_channel"]:
-            return
+    async def get_guild_config(self, guild_id):
+        """The stored settings dict, for commands that change it.
+        
+        Call save_config() after changing it. A guild without settings gets
+        the defaults, which are only written once they are changed.
+        """
+        guild_id = str(guild_id)
+        records = await self.guilds.load(guild_id)
+        if "config" not in records:
+            records["config"] = default_config()
+        else:
+            # Configs from before a section existed
+            for section, defaults in default_config().items():
+                records["config"].setdefault(section, defaults)
+        return records["config"]
+        
+    async def get_config(self, guild_id):
+        """The compiled GuildConfig, for checking messages and joins"""
+        guild_id = str(guild_id)
+        records = await self.guilds.load(guild_id)
+        if "config" not in records:
+            return self.default_config
             
-        log_channel = guild.get_channel(int(config["log_channel"]))
+        config = self.configs.get(guild_id)
+        if config is None:
+            config = self.configs[guild_id] = GuildConfig.compile(records["config"])
+        return config
+            
+    async def get_log_channel(self, guild):
+        config = await self.get_config(guild.id)
+        if config.log_channel is None:
+            return None
+        return guild.get_channel(config.log_channel)
+            
+    async def log_action(self, guild, action, user, reason, duration=None):
+        log_channel = await self.get_log_channel(guild)
         if not log_channel:
             return
             
+        self.log_digest.add(log_channel, None, (action, user.mention, user.id, reason, duration, datetime.now()))
+        
+    def log_message(self, entries):
+        if len(entries) == 1:
+            # A lone action keeps the detailed format
+            action, mention, user_id, reason, duration, timestamp = entries[0]
+            embed = discord.Embed(
+                title="AutoMod Action",
+                color=discord.Color.orange(),
+                timestamp=timestamp
+            )
+            
+            embed.add_field(name="Action", value=action, inline=True)
+            embed.add_field(name="User", value=f"{mention} ({user_id})", inline=True)
+            embed.add_field(name="Reason", value=reason, inline=False)
+            
+            if duration:
+                embed.add_field(name="Duration", value=f"{duration} minutes", inline=True)
+            return {"embed": embed}
+            
+        # Group a burst by reason, then by user
+        groups = {}
+        for action, mention, user_id, reason, duration, timestamp in entries:
+            users = groups.setdefault(reason, {})
+            if user_id not in users:
+                users[user_id] = [mention, 0, []]
+            users[user_id][1] += 1
+            if action not in users[user_id][2]:
+                users[user_id][2].append(action)
+                
         embed = discord.Embed(
-            title="AutoMod Action",
+            title=f"AutoMod Actions ({len(entries)})",
+            description=f"From {entries[0][5]:%H:%M:%S} to {entries[-1][5]:%H:%M:%S}",
             color=discord.Color.orange(),
-            timestamp=datetime.now()
+            timestamp=entries[-1][5]
         )
         
-        embed.add_field(name="Action", value=action, inline=True)
-        embed.add_field(name="User", value=f"{user.mention} ({user.id})", inline=True)
-        embed.add_field(name="Reason", value=reason, inline=False)
-        
-        if duration:
-            embed.add_field(name="Duration", value=f"{duration} minutes", inline=True)
+        # Stay well inside Discord's embed size limits
+        reasons = sorted(groups.items(), key=lambda group: -sum(user[1] for user in group[1].values()))
+        for reason, users in reasons[:LOG_DIGEST_MAX_REASONS]:
+            lines = [
+                f"{mention} ({user_id}) ×{count}: {', '.join(actions)}"
+                for user_id, (mention, count, actions) in sorted(users.items(), key=lambda user: -user[1][1])
+            ]
+            if len(lines) > LOG_DIGEST_MAX_USERS:
+                lines = lines[:LOG_DIGEST_MAX_USERS] + [f"...and {len(lines) - LOG_DIGEST_MAX_USERS} more users"]
+            embed.add_field(name=reason[:256], value="\n".join(lines)[:1024], inline=False)
             
-        await log_channel.send(embed=embed)
+        if len(reasons) > LOG_DIGEST_MAX_REASONS:
+            embed.set_footer(text=f"...and {len(reasons) - LOG_DIGEST_MAX_REASONS} more reasons")
+        return {"embed": embed}
         
-    async def apply_punishment(self, message, config_section, reason):
-        punishment = config_section["punishment"]
+    async def apply_punishment(self, message, rule, reason):
+        punishment = rule.punishment
         
         if punishment == "delete":
             try:
@@ -117,34 +239,36 @@ class AutoMod(commands.Cog):
                 pass
                 
         elif punishment == "mute":
-            # Get the muted role
-            muted_role = discord.utils.get(message.guild.roles, name="Muted")
-            if not muted_role:
-                # Create muted role
-                try:
-                    muted_role = await message.guild.create_role(name="Muted")
-                    # Set permissions
-                    for channel in message.guild.channels:
-                        await channel.set_permissions(muted_role, speak=False, send_messages=False)
-                except:
-                    return "failed to mute (couldn't create role)"
-            
-            duration = config_section.get("punishment_duration", 5)  # Default 5 minutes
+            # Get the muted role, a new one is set up in the background
+            try:
+                muted_role = await self.bot.muted_roles.get_role(message.guild)
+            except discord.HTTPException:
+                return "failed to mute (couldn't create role)"
+            
+            duration = rule.punishment_duration
             try:
                 await message.delete()
                 await message.author.add_roles(muted_role, reason=reason)
-                
-                # Schedule unmute
-                await asyncio.sleep(duration * 60)
-                try:
-                    await message.author.remove_roles(muted_role)
-                except:
-                    pass
-                    
-                return f"muted for {duration} minutes"
             except:
                 return "failed to mute"
                 
+            # Schedule unmute, the scheduler removes the role when it's due
+            self.scheduler.schedule(
+                message.guild.id, f"unmute:{message.author.id}", time.time() + duration * 60,
+                action="unmute", user_id=message.author.id, role_id=muted_role.id
+            )
+            return f"muted for {duration} minutes"
+            
+        elif punishment == "timeout":
+            # Discord lifts native timeouts itself, nothing to schedule
+            duration = min(rule.punishment_duration, 28 * 24 * 60)
+            try:
+                await message.delete()
+                await message.author.timeout(timedelta(minutes=duration), reason=reason)
+                return f"timed out for {duration} minutes"
+            except:
+                return "failed to time out"
+                
         elif punishment == "kick":
             try:
                 await message.guild.kick(message.author, reason=reason)
@@ -161,110 +285,292 @@ class AutoMod(commands.Cog):
                 
         return "no action taken"
         
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        # Ignore DMs and bot messages
-        if not message.guild or message.author.bot:
-            return
+    async def run_scheduled(self, guild_id, key, job):
+        if job["action"] == "unmute":
+            guild = self.bot.get_guild(int(guild_id))
+            if guild is None:
+                return
+            member = guild.get_member(job["user_id"])
+            role = guild.get_role(job["role_id"])
+            if member and role and role in member.roles:
+                await member.remove_roles(role, reason="AutoMod mute expired")
+                
+        elif job["action"] == "end_raid":
+            guild = self.bot.get_guild(int(guild_id))
+            if guild is not None:
+                await self.end_raid(guild, job)
+                
+    async def record_join(self, member):
+        """Whether the member joined during a raid.
+        
+        Every listener for a join may call this, the join is counted once.
+        """
+        config = await self.get_config(member.guild.id)
+        raid_config = config.anti_raid
+        if not config.enabled or not raid_config.enabled:
+            return False
             
-        guild_id = str(message.guild.id)
-        config = self.get_guild_config(guild_id)
+        raid = self.raids.record(
+            member.guild.id,
+            member,
+            time.monotonic(),
+            raid_config.max_joins,
+            raid_config.time_frame
+        )
+        if raid is None:
+            return False
+        if raid.task is None:
+            raid.task = asyncio.create_task(self.handle_raid(member.guild, raid, raid_config))
+        return True
         
-        # Skip if automod is disabled for this guild
-        if not config["enabled"]:
+    def raid_active(self, guild_id):
+        return guild_id in self.raids
+        
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        await self.record_join(member)
+        
+    async def handle_raid(self, guild, raid, raid_config):
+        # Pause invites, unless they already were
+        if raid_config.lockdown and "INVITES_DISABLED" not in guild.features:
+            try:
+                await guild.edit(invites_disabled=True, reason="AutoMod raid lockdown")
+                raid.locked = True
+            except discord.HTTPException as e:
+                print(f"Error locking down guild {guild.id}: {e}")
+                
+        # Stored, so invites are turned back on even after a restart
+        self.scheduler.schedule(
+            guild.id, "raid", time.time() + raid_config.quiet_time * 60,
+            action="end_raid", locked=raid.locked
+        )
+        await self.log_raid(
+            guild,
+            "Raid Detected",
+            f"{raid.joins} members joined within {raid_config.time_frame} seconds. "
+            f"Welcome messages are paused" + (" and invites are disabled" if raid.locked else "") + "."
+        )
+        
+        # Deal with the raid members in batches until the raid ends
+        while True:
+            ended = self.raids.raids.get(guild.id) is not raid
+            members, raid.pending = raid.pending, []
+            if members:
+                await self.raid_action(guild, raid, members, raid_config)
+            if ended:
+                break
+            await asyncio.sleep(RAID_ACTION_INTERVAL)
+            
+    async def raid_action(self, guild, raid, members, raid_config):
+        action = raid_config.action
+        if action == "none":
             return
             
-        # Check for spam
-        if config["anti_spam"]["enabled"]:
-            key = f"{guild_id}:{message.author.id}"
-            now = datetime.now()
-            self.user_message_times[key].append(now)
+        # Older accounts are let in
+        cutoff = discord.utils.utcnow() - timedelta(days=raid_config.min_account_age)
+        members = [member for member in members if member.created_at > cutoff]
+        reason = "AutoMod raid protection"
+        
+        # discord.py 2.3 has no bulk ban, so every member is one API call
+        semaphore = asyncio.Semaphore(RAID_CONCURRENCY)
+        
+        async def apply(member):
+            async with semaphore:
+                try:
+                    if action == "ban":
+                        await guild.ban(member, reason=reason, delete_message_seconds=3600)
+                    else:
+                        await guild.kick(member, reason=reason)
+                    raid.actioned += 1
+                except discord.HTTPException:
+                    raid.failed += 1
+                    
+        await asyncio.gather(*(apply(member) for member in members))
+        
+    async def end_raid(self, guild, job, force=False):
+        raid = self.raids.raids.get(guild.id)
+        config = await self.get_config(guild.id)
+        quiet_time = config.anti_raid.quiet_time * 60
+        
+        # Still getting joins, check again later
+        if raid is not None:
+            quiet_for = time.monotonic() - raid.last_join
+            if quiet_for < quiet_time and not force:
+                self.scheduler.schedule(
+                    guild.id, "raid", time.time() + quiet_time - quiet_for,
+                    action="end_raid", locked=job["locked"]
+                )
+                return
+            self.raids.end(guild.id)
             
-            # Check if user sent too many messages in the time frame
-            time_frame = config["anti_spam"]["time_frame"]
-            max_messages = config["anti_spam"]["max_messages"]
+        if job["locked"]:
+            try:
+                await guild.edit(invites_disabled=False, reason="AutoMod raid ended")
+            except discord.HTTPException as e:
+                print(f"Error lifting lockdown in guild {guild.id}: {e}")
+                
+        summary = "Raid mode ended."
+        if raid is not None:
+            summary += f" {raid.joins} members joined during the raid, {raid.actioned} were removed"
+            summary += f" ({raid.failed} failed)." if raid.failed else "."
+        await self.log_raid(guild, "Raid Ended", summary)
+        
+    async def log_raid(self, guild, title, description):
+        log_channel = await self.get_log_channel(guild)
+        if not log_channel:
+            return
             
-            # Only check if they've sent at least max_messages
-            if len(self.user_message_times[key]) >= max_messages:
-                # Get the oldest message time in our window
-                oldest = self.user_message_times[key][0]
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=discord.Color.red(),
+            timestamp=datetime.now()
+        )
+        try:
+            await log_channel.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"Error sending raid log: {e}")
                 
-                # If the time difference is less than the time frame, it's spam
-                if (now - oldest).total_seconds() < time_frame:
-                    reason = f"Sending messages too quickly ({max_messages} in {time_frame}s)"
-                    action = await self.apply_punishment(message, config["anti_spam"], reason)
+    async def check_message(self, ctx):
+        # Message pipeline stage, DMs and bot messages never get here
+        config = await self.get_config(ctx.guild_key)
+        
+        # Skip if automod is disabled for this guild
+        if not config.enabled:
+            return
+            
+        # Each enabled check returns why the message breaks the rules, or None
+        for name, rule in config.checks:
+            reason = await self.checks[name](ctx, rule)
+            if reason:
+                ctx.stop("automod")
+                message = ctx.message
+                # Only the same check collapses, so each message still gets its own rule
+                key = (ctx.guild_id, ctx.author_id, name)
+                # Already being punished for this, the message is dealt with along with it
+                if self.punishments.collapse(key, message):
+                    return
+                    
+                punishment = self.punishments.start(key, rule, reason)
+                try:
+                    action = await self.apply_punishment(message, rule, reason)
                     await self.log_action(
-                        message.guild, 
-                        action, 
-                        message.author, 
+                        message.guild,
+                        action,
+                        message.author,
                         reason,
-                        config["anti_spam"].get("punishment_duration")
+                        rule.punishment_duration if rule.punishment in ("mute", "timeout") else None
                     )
-                    return  # Stop processing this message
-            
-        # Check for mention spam
-        if config["anti_mention"]["enabled"] and message.mentions:
-            max_mentions = config["anti_mention"]["max_mentions"]
-            if len(message.mentions) > max_mentions:
-                reason = f"Too many mentions in one message ({len(message.mentions)})"
-                action = await self.apply_punishment(message, config["anti_mention"], reason)
-                await self.log_action(
-                    message.guild,
-                    action,
-                    message.author,
-                    reason,
-                    config["anti_mention"].get("punishment_duration")
-                )
-                return  # Stop processing
+                finally:
+                    self.punishments.finish(key, punishment)
+                return  # Stop processing this message
                 
-        # Check for bad words
-        if config["word_filter"]["enabled"]:
-            content = message.content.lower()
-            for word in config["word_filter"]["filtered_words"]:
-                pattern = r'\b' + re.escape(word.lower()) + r'\b'
-                if re.search(pattern, content):
-                    reason = f"Filtered word detected: {word}"
-                    action = await self.apply_punishment(message, config["word_filter"], reason)
-                    await self.log_action(message.guild, action, message.author, reason)
-                    return  # Stop processing
-                    
+    async def clean_up_burst(self, punishment, messages):
+        # Violations that came in while the member was already being punished
+        guild, author = messages[0].guild, messages[0].author
+        if punishment.rule.punishment not in DELETING_PUNISHMENTS:
+            await self.log_action(guild, f"ignored {len(messages)} more violations", author, punishment.reason)
+            return
+            
+        # One bulk delete per channel instead of a request per message
+        channels = {}
+        for message in messages:
+            channels.setdefault(message.channel, []).append(message)
+        deleted = 0
+        for channel, channel_messages in channels.items():
+            for start in range(0, len(channel_messages), BULK_DELETE_SIZE):
+                chunk = channel_messages[start:start + BULK_DELETE_SIZE]
+                try:
+                    await channel.delete_messages(chunk, reason=punishment.reason)
+                    deleted += len(chunk)
+                except discord.HTTPException as e:
+                    print(f"Error deleting messages in {channel.id}: {e}")
+        await self.log_action(guild, f"deleted {deleted} more messages", author, punishment.reason)
+                
+    async def check_spam(self, ctx, rule):
+        # Check if user sent too many messages in the time frame
+        time_frame = rule.time_frame
+        max_messages = rule.max_messages
+        
+        if self.message_rates.add((ctx.guild_id, ctx.author_id), time_frame, ctx.now) >= max_messages:
+            return f"Sending messages too quickly ({max_messages} in {time_frame}s)"
+        return None
+        
+    async def check_mentions(self, ctx, rule):
+        # Check for mention spam, in one message and across messages
+        mentions = len(ctx.message.mentions)
+        if not mentions:
+            return None
+            
+        max_mentions = rule.max_mentions
+        time_frame = rule.time_frame
+        max_total = rule.max_total_mentions
+        total = self.mention_rates.add((ctx.guild_id, ctx.author_id), time_frame, ctx.now, mentions)
+        
+        if mentions > max_mentions:
+            return f"Too many mentions in one message ({mentions})"
+        if total > max_total:
+            return f"Too many mentions ({total} in {time_frame}s)"
+        return None
+        
+    async def check_words(self, ctx, rule):
+        # Check for bad words, all of them in one pass
+        word = rule.matcher.search(ctx.content_lower)
+        if word:
+            return f"Filtered word detected: {word}"
+        return None
+        
+    async def check_invites(self, ctx, rule):
         # Check for Discord invites
-        if config["invite_filter"]["enabled"]:
-            invite_pattern = r'discord(?:\.gg|app\.com\/invite|\.com\/invite)\/([a-zA-Z0-9\-]{2,})'
-            invites = re.findall(invite_pattern, message.content)
-            
-            if invites:
-                # If no allowed servers are specified, block all invites
-                if not config["invite_filter"]["allowed_servers"]:
-                    reason = "Discord invite link not allowed"
-                    action = await self.apply_punishment(message, config["invite_filter"], reason)
-                    await self.log_action(message.guild, action, message.author, reason)
-                    return
+        invites = INVITE_PATTERN.findall(ctx.message.content)
+        if not invites:
+            return None
+            
+        # If no allowed servers are specified, block all invites
+        if not rule.allowed_servers:
+            return "Discord invite link not allowed"
+            
+        # Check each invite, a code repeated in the message is looked up once
+        for invite_code in dict.fromkeys(invites):
+            try:
+                invite_guild = await self.invites.resolve(invite_code)
+            except discord.HTTPException:
+                invite_guild = None
+                
+            if invite_guild is None:
+                # If we can't resolve the invite, assume it's not allowed
+                return "Discord invite link not allowed (could not verify server)"
                 
-                # Check each invite
-                for invite_code in invites:
-                    try:
-                        invite = await self.bot.fetch_invite(invite_code)
-                        if str(invite.guild.id) not in config["invite_filter"]["allowed_servers"]:
-                            reason = f"Invite to non-allowed server: {invite.guild.name}"
-                            action = await self.apply_punishment(message, config["invite_filter"], reason)
-                            await self.log_action(message.guild, action, message.author, reason)
-                            return
-                    except:
-                        # If we can't fetch the invite, assume it's not allowed
-                        reason = "Discord invite link not allowed (could not verify server)"
-                        action = await self.apply_punishment(message, config["invite_filter"], reason)
-                        await self.log_action(message.guild, action, message.author, reason)
-                        return
-                        
+            if str(invite_guild[0]) not in rule.allowed_servers:
+                return f"Invite to non-allowed server: {invite_guild[1]}"
+        return None
+        
+    async def check_duplicates(self, ctx, rule):
+        # Check for the same message from many members
+        store = self.fingerprints.get(ctx.guild_key)
+        if store is None:
+            store = self.fingerprints[ctx.guild_key] = FingerprintStore(self.fingerprinter)
+            
+        authors = store.add(
+            ctx.author_id,
+            ctx.content_lower,
+            ctx.now,
+            rule.time_frame,
+            rule.similarity,
+            rule.max_authors
+        )
+        if authors >= rule.max_authors:
+            return f"Same message as {authors}+ other members in {rule.time_frame}s"
+        return None
+        
     @app_commands.command(name="automod", description="Toggle automod on/off")
     @app_commands.default_permissions(manage_guild=True)
     async def toggle_automod(self, interaction: discord.Interaction):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["enabled"] = not config["enabled"]
-        self.save_config()
+        self.save_config(guild_id)
         
         status = "enabled" if config["enabled"] else "disabled"
         await interaction.response.send_message(f"AutoMod {status}!")
@@ -274,19 +580,137 @@ class AutoMod(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def set_log_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["log_channel"] = str(channel.id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"AutoMod log channel set to {channel.mention}!")
         
+    @app_commands.command(name="automodpunishment", description="Set what AutoMod does when a check is triggered")
+    @app_commands.describe(
+        check="The AutoMod check to configure",
+        punishment="What to do (timeout uses Discord's built-in timeout, mute uses the Muted role)",
+        duration="Minutes to mute or time out for"
+    )
+    @app_commands.default_permissions(manage_guild=True)
+    async def set_punishment(self, interaction: discord.Interaction,
+                             check: Literal["anti_spam", "anti_mention", "word_filter", "invite_filter", "duplicate_filter"],
+                             punishment: Literal["delete", "warn", "mute", "timeout", "kick", "ban"],
+                             duration: app_commands.Range[int, 1, 40320] = None):
+        guild_id = str(interaction.guild.id)
+        config = await self.get_guild_config(guild_id)
+        
+        config[check]["punishment"] = punishment
+        if duration is not None:
+            config[check]["punishment_duration"] = duration
+        self.save_config(guild_id)
+        
+        message = f"AutoMod {check} punishment set to {punishment}"
+        if punishment in ("mute", "timeout"):
+            message += f" for {config[check].get('punishment_duration', 5)} minutes"
+        await interaction.response.send_message(message + "!")
+        
+    @app_commands.command(name="antiraid", description="Configure raid detection on member joins")
+    @app_commands.describe(
+        enabled="Turn raid detection on or off",
+        max_joins="Joins within the time frame that start a raid",
+        time_frame="Time frame in seconds",
+        account_age="Accounts younger than this many days get the raid action",
+        action="What to do with new accounts joining during a raid (one API call per account)",
+        lockdown="Pause invites while a raid lasts",
+        quiet_time="Minutes without joins before a raid ends"
+    )
+    @app_commands.default_permissions(manage_guild=True)
+    async def set_anti_raid(self, interaction: discord.Interaction,
+                            enabled: bool = None,
+                            max_joins: app_commands.Range[int, 2, 500] = None,
+                            time_frame: app_commands.Range[int, 1, 600] = None,
+                            account_age: app_commands.Range[int, 0, 365] = None,
+                            action: Literal["none", "kick", "ban"] = None,
+                            lockdown: bool = None,
+                            quiet_time: app_commands.Range[int, 1, 1440] = None):
+        guild_id = str(interaction.guild.id)
+        config = await self.get_guild_config(guild_id)
+        raid_config = config["anti_raid"]
+        
+        changes = {
+            "enabled": enabled,
+            "max_joins": max_joins,
+            "time_frame": time_frame,
+            "min_account_age": account_age,
+            "action": action,
+            "lockdown": lockdown,
+            "quiet_time": quiet_time
+        }
+        changes = {key: value for key, value in changes.items() if value is not None}
+        if changes:
+            raid_config.update(changes)
+            self.save_config(guild_id)
+            
+        embed = discord.Embed(title="Raid Detection", color=discord.Color.blue())
+        embed.add_field(name="Enabled", value="Yes" if raid_config["enabled"] else "No", inline=True)
+        embed.add_field(name="Trigger", value=f"{raid_config['max_joins']} joins in {raid_config['time_frame']}s", inline=True)
+        embed.add_field(name="Action", value=f"{raid_config['action']} (accounts under {raid_config['min_account_age']} days)", inline=True)
+        embed.add_field(name="Lockdown", value="Yes" if raid_config["lockdown"] else "No", inline=True)
+        embed.add_field(name="Ends After", value=f"{raid_config['quiet_time']} quiet minutes", inline=True)
+        await interaction.response.send_message(embed=embed)
+        
+    @app_commands.command(name="duplicatefilter", description="Configure detection of the same message sent by many members")
+    @app_commands.describe(
+        enabled="Turn the duplicate message check on or off",
+        max_authors="Other members who must have sent the same message in the time frame",
+        time_frame="Time frame in seconds",
+        similarity="How close two messages must be to count as the same, 0.1 to 1"
+    )
+    @app_commands.default_permissions(manage_guild=True)
+    async def set_duplicate_filter(self, interaction: discord.Interaction,
+                                   enabled: bool = None,
+                                   max_authors: app_commands.Range[int, 2, 100] = None,
+                                   time_frame: app_commands.Range[int, 5, 3600] = None,
+                                   similarity: app_commands.Range[float, 0.1, 1.0] = None):
+        guild_id = str(interaction.guild.id)
+        config = await self.get_guild_config(guild_id)
+        duplicate_config = config["duplicate_filter"]
+        
+        changes = {
+            "enabled": enabled,
+            "max_authors": max_authors,
+            "time_frame": time_frame,
+            "similarity": similarity
+        }
+        changes = {key: value for key, value in changes.items() if value is not None}
+        if changes:
+            duplicate_config.update(changes)
+            self.save_config(guild_id)
+            
+        embed = discord.Embed(title="Duplicate Message Filter", color=discord.Color.blue())
+        embed.add_field(name="Enabled", value="Yes" if duplicate_config["enabled"] else "No", inline=True)
+        embed.add_field(name="Trigger", value=f"{duplicate_config['max_authors']} other members in {duplicate_config['time_frame']}s", inline=True)
+        embed.add_field(name="Similarity", value=f"{duplicate_config['similarity']:.0%}", inline=True)
+        embed.add_field(name="Punishment", value=duplicate_config["punishment"], inline=True)
+        await interaction.response.send_message(embed=embed)
+        
+    @app_commands.command(name="endraid", description="End raid mode and turn invites back on")
+    @app_commands.default_permissions(manage_guild=True)
+    async def end_raid_command(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        job = self.scheduler.jobs.get((str(guild.id), "raid"))
+        if job is None and not self.raid_active(guild.id):
+            await interaction.response.send_message("No raid in progress.", ephemeral=True)
+            return
+            
+        await interaction.response.defer()
+        self.scheduler.cancel(guild.id, "raid")
+        await self.end_raid(guild, job or {"locked": False}, force=True)
+        await interaction.followup.send("Raid mode ended.")
+        
     @app_commands.command(name="addfilterword", description="Add a word to the filter")
     @app_commands.describe(word="The word to filter")
     @app_commands.default_permissions(manage_guild=True)
-    async def add_filter_word(self, interaction: discord.Interaction, word: str):
+    async def add_filter_word(self, interaction: discord.Interaction, word: app_commands.Range[str, 1, 100]):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         word = word.lower()
         if word in config["word_filter"]["filtered_words"]:
@@ -294,7 +718,7 @@ class AutoMod(commands.Cog):
             return
             
         config["word_filter"]["filtered_words"].append(word)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"Added '{word}' to the filter!", ephemeral=True)
         
@@ -303,7 +727,7 @@ class AutoMod(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def remove_filter_word(self, interaction: discord.Interaction, word: str):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         word = word.lower()
         if word not in config["word_filter"]["filtered_words"]:
@@ -311,7 +735,7 @@ class AutoMod(commands.Cog):
             return
             
         config["word_filter"]["filtered_words"].remove(word)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"Removed '{word}' from the filter!", ephemeral=True)
         
@@ -319,7 +743,7 @@ class AutoMod(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def list_filter_words(self, interaction: discord.Interaction):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         words = config["word_filter"]["filtered_words"]
         if not words:
@@ -343,14 +767,14 @@ class AutoMod(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def allow_server(self, interaction: discord.Interaction, server_id: str):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         if server_id in config["invite_filter"]["allowed_servers"]:
             await interaction.response.send_message(f"Server ID {server_id} is already allowed!", ephemeral=True)
             return
             
         config["invite_filter"]["allowed_servers"].append(server_id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"Added server ID {server_id} to allowed servers!", ephemeral=True)
         
@@ -359,14 +783,14 @@ class AutoMod(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def disallow_server(self, interaction: discord.Interaction, server_id: str):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         if server_id not in config["invite_filter"]["allowed_servers"]:
             await interaction.response.send_message(f"Server ID {server_id} is not in the allowed list!", ephemeral=True)
             return
             
         config["invite_filter"]["allowed_servers"].remove(server_id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"Removed server ID {server_id} from allowed servers!", ephemeral=True)
 
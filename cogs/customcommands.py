@@ -1,8 +1,6 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 import re
 from typing import Optional, Literal
 
@@ -10,34 +8,30 @@ class CustomCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.commands = {}
-        self.load_commands()
-        
-    def load_commands(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
+        self.repo = bot.storage.repository("custom_commands")
         
+    async def load_commands(self):
         try:
-            if os.path.exists('data/custom_commands.json'):
-                with open('data/custom_commands.json', 'r') as f:
-                    data = json.load(f)
-                    
-                    # Convert string keys to int (Discord IDs are stored as strings in JSON)
-                    self.commands = {int(guild_id): guild_cmds for guild_id, guild_cmds in data.items()}
+            # Move data over from the old JSON file on first run
+            await self.repo.import_legacy(
+                'data/custom_commands.json',
+                lambda data: ((guild_id, name, cmd)
+                              for guild_id, guild_cmds in data.items()
+                              for name, cmd in guild_cmds.items())
+            )
+            
+            # Convert string keys to int (Discord IDs are stored as strings in the database)
+            self.commands = {int(guild_id): guild_cmds for guild_id, guild_cmds in (await self.repo.load_all()).items()}
         except Exception as e:
             print(f"Error loading custom commands data: {e}")
             self.commands = {}
     
-    def save_commands(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            
-        try:
-            with open('data/custom_commands.json', 'w') as f:
-                # Convert int keys to strings for JSON serialization
-                data = {str(guild_id): guild_cmds for guild_id, guild_cmds in self.commands.items()}
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving custom commands data: {e}")
+    def save_command(self, guild_id, name):
+        # Queued and written on the storage thread
+        self.repo.save(guild_id, name, self.commands[guild_id][name])
+    
+    def delete_command(self, guild_id, name):
+        self.repo.remove(guild_id, name)
     
     @app_commands.command(name="addcmd", description="Add a custom command")
     @app_commands.describe(
@@ -94,7 +88,7 @@ class CustomCommands(commands.Cog):
             'created_at': interaction.created_at.isoformat()
         }
         
-        self.save_commands()
+        self.save_command(guild_id, name)
         
         # Register the command with Discord
         @app_commands.command(name=name, description=description)
@@ -151,7 +145,7 @@ class CustomCommands(commands.Cog):
         current['last_edited_by'] = interaction.user.id
         current['last_edited_at'] = interaction.created_at.isoformat()
         
-        self.save_commands()
+        self.save_command(guild_id, name)
         
         # Update the command in Discord
         # Remove the old command
@@ -206,7 +200,7 @@ class CustomCommands(commands.Cog):
         if not self.commands[guild_id]:
             del self.commands[guild_id]
             
-        self.save_commands()
+        self.delete_command(guild_id, name)
         
         # Remove the command from Discord
         for command in self.bot.tree.get_commands(guild=discord.Object(id=guild_id)):
@@ -362,6 +356,7 @@ class CustomCommands(commands.Cog):
                 
     async def cog_load(self):
         """Tasks to run when the cog is loaded"""
+        await self.load_commands()
         self.bot.loop.create_task(self.sync_commands())
 
 async def setup(bot):
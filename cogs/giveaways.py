@@ -1,8 +1,6 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 import asyncio
 import random
 from datetime import datetime, timedelta
@@ -12,34 +10,25 @@ class Giveaways(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.active_giveaways = {}
-        self.load_giveaways()
-        
-    def load_giveaways(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
+        self.repo = bot.storage.repository("giveaways")
         
+    async def load_giveaways(self):
         try:
-            if os.path.exists('data/giveaways.json'):
-                with open('data/giveaways.json', 'r') as f:
-                    data = json.load(f)
-                    
-                    # Convert string keys to int (Discord IDs are stored as strings in JSON)
-                    self.active_giveaways = {int(k): v for k, v in data.items()}
+            # Move data over from the old JSON file on first run
+            await self.repo.import_legacy(
+                'data/giveaways.json',
+                lambda data: (("", giveaway_id, giveaway) for giveaway_id, giveaway in data.items())
+            )
+            
+            # Convert string keys to int (Discord IDs are stored as strings in the database)
+            self.active_giveaways = {int(k): v for k, v in (await self.repo.load_scope("")).items()}
         except Exception as e:
             print(f"Error loading giveaways data: {e}")
             self.active_giveaways = {}
     
-    def save_giveaways(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            
-        try:
-            with open('data/giveaways.json', 'w') as f:
-                # Convert int keys to strings for JSON serialization
-                data = {str(k): v for k, v in self.active_giveaways.items()}
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving giveaways data: {e}")
+    def save_giveaway(self, giveaway_id):
+        # Queued and written on the storage thread
+        self.repo.save("", giveaway_id, self.active_giveaways[giveaway_id])
     
     @app_commands.command(name="giveaway", description="Start a new giveaway")
     @app_commands.describe(
@@ -101,7 +90,7 @@ class Giveaways(commands.Cog):
             'ended': False
         }
         
-        self.save_giveaways()
+        self.save_giveaway(giveaway_message.id)
         
         # Schedule the giveaway to end
         self.bot.loop.create_task(self.end_giveaway_after(giveaway_message.id, duration * 60))
@@ -273,7 +262,7 @@ class Giveaways(commands.Cog):
             if not reaction:
                 await channel.send(f"Could not end the giveaway for {giveaway['prize']} because the reaction was removed.")
                 giveaway['ended'] = True
-                self.save_giveaways()
+                self.save_giveaway(giveaway_id)
                 return
             
             # Get all users who reacted (excluding the bot)
@@ -286,7 +275,7 @@ class Giveaways(commands.Cog):
             if len(users) < giveaway['winners']:
                 await channel.send(f"Not enough participants for the giveaway of **{giveaway['prize']}**. Needed {giveaway['winners']} participants, but only got {len(users)}.")
                 giveaway['ended'] = True
-                self.save_giveaways()
+                self.save_giveaway(giveaway_id)
                 return
             
             # Get the winners
@@ -313,14 +302,14 @@ class Giveaways(commands.Cog):
             giveaway['ended'] = True
             giveaway['winners_ids'] = [winner.id for winner in winners]
             giveaway['winners_message_id'] = winners_message.id
-            self.save_giveaways()
+            self.save_giveaway(giveaway_id)
             
         except Exception as e:
             print(f"Error ending giveaway {giveaway_id}: {e}")
             
             # Mark as ended anyway to avoid repeated failures
             giveaway['ended'] = True
-            self.save_giveaways()
+            self.save_giveaway(giveaway_id)
     
     async def reroll_giveaway(self, giveaway_id, num_winners):
         # Check if giveaway exists and has ended
@@ -372,6 +361,7 @@ class Giveaways(commands.Cog):
     
     async def cog_load(self):
         """Tasks to run when the cog is loaded"""
+        await self.load_giveaways()
         self.bot.loop.create_task(self.check_giveaways())
         
     async def check_giveaways(self):
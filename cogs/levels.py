@@ -1,102 +1,321 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import random
+import asyncio
 import os
-from datetime import datetime, timedelta
+import random
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Literal
+from utils.announcements import AnnouncementQueue
+from utils.cooldowns import CooldownStore
+from utils.guildcache import GuildCache
+from utils.journal import Journal
+from utils.levelcurve import MAX_XP, LevelCurve
+from utils.leveldata import GuildLevels
+from utils.writebehind import WriteBehind
+from utils.xpfile import TableReader, write_table
+
+LEADERBOARD_PAGE_SIZE = 10
+VOICE_XP_INTERVAL = 60  # Seconds between voice XP awards
+VOICE_XP = 10  # XP per interval spent talking in voice
+PIPELINE_PRIORITY = 50  # After moderation, so removed messages earn nothing
+
+class LeaderboardView(discord.ui.View):
+    def __init__(self, cog, guild, user_id, page=0):
+        super().__init__(timeout=180)
+        self.cog = cog
+        self.guild = guild
+        self.user_id = user_id
+        self.page = page
+        self.message = None
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Only the member who opened the leaderboard can turn its pages
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("Use /leaderboard to browse the leaderboard yourself.", ephemeral=True)
+            return False
+        return True
+
+    def update_buttons(self, users):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.cog.page_count(users) - 1
+
+    async def show_page(self, interaction, page):
+        users = await self.cog.guilds.load(self.guild.id)
+        self.page = max(0, min(page, self.cog.page_count(users) - 1))
+        self.update_buttons(users)
+        await interaction.response.edit_message(embed=self.cog.leaderboard_embed(self.guild, users, self.page), view=self)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        # Grey out the buttons once they stop working
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
 
 class Levels(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.levels_file = "data/levels.json"
-        self.cooldowns = {}  # Store message cooldowns
-        self.ensure_data_folder()
-        self.levels = self.load_levels()
-
-    def ensure_data_folder(self):
-        if not os.path.exists("data"):
-            os.makedirs("data")
-        if not os.path.exists(self.levels_file):
-            with open(self.levels_file, "w") as f:
-                json.dump({}, f)
-
-    def load_levels(self):
+        self.legacy_file = "data/levels.json"
+        self.journal_file = "data/levels.journal"
+        self.repo = bot.storage.repository("levels")
+        self.curve_repo = bot.storage.repository("levelcurves")
+        self.default_curve = LevelCurve()
+        self.curves = {}  # Guilds that changed their level curve
+        self.channel_repo = bot.storage.repository("levelchannels")
+        self.level_channels = {}  # Guilds that announce level-ups in a fixed channel
+        self.cooldowns = CooldownStore(60)  # One XP award per user per minute
+        self.journal = None
+        # Rendered leaderboard pages per guild, valid until the ranking changes
+        self.leaderboard_pages = OrderedDict()
+        # Level-ups in the same channel within a few seconds share one message
+        self.announcements = AnnouncementQueue(self.level_up_message)
+        # Voice channels that may have members earning XP
+        self.voice_channels = set()
+        self.voice_task = None
+        self.voice_stats = {"members": 0, "ms": 0.0}
+        
+        # XP changes are buffered and written in batches. Every award is also
+        # appended to a journal, which is compacted on the storage thread once
+        # a batch containing it has been committed.
+        self.writer = WriteBehind(
+            self.repo,
+            lambda guild_id, user_id: self.guilds.entries[guild_id].to_dict(user_id),
+            interval=10,
+            max_pending=500,
+            meta=lambda: {"levels.journal_seq": self.journal.seq},
+            on_flushed=lambda meta: bot.storage.run(self.journal.truncate, meta["levels.journal_seq"])
+        )
+        
+        # Guilds are loaded when they first chat and dropped again when idle,
+        # but never while they still have unwritten XP. In memory each guild
+        # is a compact column table. A reloaded table starts a new version
+        # count, so its cached leaderboard pages go with it.
+        self.guilds = GuildCache(
+            self.repo,
+            can_evict=lambda guild_id: not self.writer.is_dirty(guild_id),
+            decode=GuildLevels.from_records,
+            on_evict=lambda guild_id: self.leaderboard_pages.pop(guild_id, None)
+        )
+
+    async def cog_load(self):
+        # Move data over from the old JSON file on first run
+        await self.repo.import_legacy(
+            self.legacy_file,
+            lambda data: ((guild_id, user_id, user_data)
+                          for guild_id, users in data.items()
+                          for user_id, user_data in users.items())
+        )
+        
+        for guild_id, records in (await self.curve_repo.load_all()).items():
+            self.curves[guild_id] = LevelCurve(**records["curve"])
+        for guild_id, records in (await self.channel_repo.load_all()).items():
+            self.level_channels[guild_id] = records["channel"]
+        
+        snapshot_seq = await self.bot.storage.get_meta("levels.journal_seq", 0)
+        self.journal = Journal(self.journal_file, snapshot_seq)
+        await self.replay_journal(snapshot_seq)
+        self.writer.start()
+        self.guilds.start()
+        
+        self.bot.pipeline.add_stage("levels", self.award_message_xp, PIPELINE_PRIORITY)
+        if self.bot.is_ready():
+            self.track_voice_channels()
+        self.voice_task = self.bot.loop.create_task(self.voice_xp_loop())
+
+    async def cog_unload(self):
+        # Make sure buffered XP reaches the database on unload and shutdown
+        self.bot.pipeline.remove_stage("levels")
         try:
-            with open(self.levels_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
+            if self.voice_task:
+                self.voice_task.cancel()
+            await self.announcements.stop()
+            await self.guilds.stop()
+            await self.writer.stop()
+        finally:
+            self.journal.close()
+
+    def perf_stats(self):
+        stats = self.guilds.stats()
+        cooldowns = self.cooldowns.stats()
+        announcements = self.announcements.stats()
+        return (f"Guilds in memory: {stats['guilds']} ({stats['records']} users)\n"
+                f"Guild loads: {stats['loads']} | Evictions: {stats['evictions']}\n"
+                f"XP cooldowns: {cooldowns['size']} active | Hit rate: {cooldowns['hit_rate']:.1f}% "
+                f"| Expired: {cooldowns['expired']}\n"
+                f"Level-ups: {announcements['queued']} announced in {announcements['sent']} messages\n"
+                f"Voice XP: {self.voice_stats['members']} members in the last tick "
+                f"({self.voice_stats['ms']:.1f}ms)")
+
+    async def replay_journal(self, snapshot_seq):
+        # Re-apply XP awarded after the last batch was written, e.g. before a crash
+        for seq, guild_id, user_id, delta in self.journal.replay(snapshot_seq):
+            await self.guilds.load(guild_id)
+            try:
+                user_data = self.get_user_data(user_id, guild_id)
+                user_data["xp"] = min(user_data["xp"] + delta, MAX_XP)
+                user_data["level"] = self.get_level_from_xp(user_data["xp"], guild_id)
+            except (ValueError, OverflowError) as e:
+                # Skip it rather than keep the cog from loading on every start
+                print(f"Skipping XP journal entry {seq}: {e}")
+                continue
+            self.save_user_data(user_id, guild_id)
 
-    def save_levels(self):
-        with open(self.levels_file, "w") as f:
-            json.dump(self.levels, f, indent=4)
+    def save_user_data(self, user_id, guild_id):
+        # Only marks the record dirty, the write-behind task persists it
+        self.writer.mark(str(guild_id), str(user_id))
 
-    def get_level_from_xp(self, xp):
-        return int(xp ** 0.3)
+    def get_curve(self, guild_id):
+        return self.curves.get(str(guild_id), self.default_curve)
 
-    def get_xp_for_level(self, level):
-        return int(level ** (1/0.3))
+    def get_level_from_xp(self, xp, guild_id):
+        return self.get_curve(guild_id).level(xp)
+
+    def get_xp_for_level(self, level, guild_id):
+        return self.get_curve(guild_id).xp_for_level(level)
 
     def get_user_data(self, user_id, guild_id):
-        guild_id = str(guild_id)
-        user_id = str(user_id)
-        
-        if guild_id not in self.levels:
-            self.levels[guild_id] = {}
-            
-        if user_id not in self.levels[guild_id]:
-            self.levels[guild_id][user_id] = {
-                "xp": 0,
-                "level": 0,
-                "last_message": 0
-            }
-            
-        return self.levels[guild_id][user_id]
+        # The guild has to be loaded first with `await self.guilds.load(guild_id)`.
+        # Returns a record used like the old dict: record["xp"], record["level"]
+        return self.guilds.get(guild_id).get(user_id)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        # Don't count bot messages or commands
-        if message.author.bot or message.content.startswith(("!", "/")):
+    async def award_message_xp(self, ctx):
+        # Message pipeline stage, DMs and bot messages never get here
+        message = ctx.message
+        
+        # Don't count commands
+        if message.content.startswith(("!", "/")):
             return
             
         # Check cooldown (60 seconds)
-        user_id = str(message.author.id)
-        guild_id = str(message.guild.id)
-        cooldown_key = f"{guild_id}:{user_id}"
-        
-        current_time = datetime.now().timestamp()
-        if cooldown_key in self.cooldowns:
-            if current_time - self.cooldowns[cooldown_key] < 60:
-                return  # Still on cooldown
-                
-        # Update cooldown
-        self.cooldowns[cooldown_key] = current_time
-        
-        # Get user data
-        user_data = self.get_user_data(user_id, guild_id)
+        if not self.cooldowns.trigger((ctx.guild_id, ctx.author_id), ctx.now):
+            return  # Still on cooldown
+            
+        guild_id = ctx.guild_key
+        await self.guilds.load(guild_id)
         
         # Award XP (random between 15-25)
         xp_gained = random.randint(15, 25)
+        self.journal.append(guild_id, message.author.id, xp_gained)
+        self.add_xp(message.author, guild_id, xp_gained, message.channel)
+        
+    def add_xp(self, member, guild_id, xp_gained, channel):
+        # The guild has to be loaded and the award journaled by the caller
+        user_data = self.get_user_data(member.id, guild_id)
         old_level = user_data["level"]
-        user_data["xp"] += xp_gained
-        new_level = self.get_level_from_xp(user_data["xp"])
+        # Stop at the most the int64 column holds instead of failing the award
+        user_data["xp"] = min(user_data["xp"] + xp_gained, MAX_XP)
+        new_level = self.get_level_from_xp(user_data["xp"], guild_id)
         user_data["level"] = new_level
-        
-        self.save_levels()
+        self.save_user_data(member.id, guild_id)
         
         # Check for level up
         if new_level > old_level:
-            # Find a suitable channel to send the level up message
-            channel = message.channel
+            # Use the guild's level-up channel if it has one
+            if guild_id in self.level_channels:
+                channel = member.guild.get_channel(int(self.level_channels[guild_id])) or channel
+                
+            self.announcements.add(channel, member.id, (member.mention, new_level))
             
-            embed = discord.Embed(
-                title="Level Up!",
-                description=f"Congratulations {message.author.mention}! You've reached level **{new_level}**!",
-                color=discord.Color.green()
-            )
+    def track_voice_channels(self):
+        # Pick up members who were already in voice, e.g. after a restart
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels + guild.stage_channels:
+                if channel.voice_states:
+                    self.voice_channels.add(channel.id)
+                    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.track_voice_channels()
+        
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        # Channels are dropped again by the voice XP tick once they are empty
+        if after.channel is not None and not member.bot:
+            self.voice_channels.add(after.channel.id)
             
-            await channel.send(embed=embed)
+    def voice_earners(self, channel):
+        """Members of a voice channel who earn XP this tick"""
+        if channel == channel.guild.afk_channel:
+            return []
+            
+        members = [
+            member for member in channel.members
+            if not member.bot and member.voice
+            and not (member.voice.self_mute or member.voice.self_deaf or member.voice.mute or member.voice.deaf)
+        ]
+        # Sitting in a channel alone doesn't count
+        return members if len(members) >= 2 else []
+        
+    async def voice_xp_loop(self):
+        """Award voice XP to everyone in voice at once, every interval"""
+        await self.bot.wait_until_ready()
+        
+        while not self.bot.is_closed():
+            await asyncio.sleep(VOICE_XP_INTERVAL)
+            try:
+                await self.award_voice_xp()
+            except Exception as e:
+                print(f"Error awarding voice XP: {e}")
+                
+    async def award_voice_xp(self):
+        start = time.perf_counter()
+        earners = {}  # guild_id -> [(member, channel)]
+        
+        for channel_id in list(self.voice_channels):
+            channel = self.bot.get_channel(channel_id)
+            if channel is None or not channel.voice_states:
+                self.voice_channels.discard(channel_id)
+                continue
+            for member in self.voice_earners(channel):
+                earners.setdefault(str(channel.guild.id), []).append((member, channel))
+                
+        for guild_id, members in earners.items():
+            await self.guilds.load(guild_id)
+            # One journal write per guild, nothing is awaited until the XP is applied
+            self.journal.append_many((guild_id, member.id, VOICE_XP) for member, _ in members)
+            for member, channel in members:
+                self.add_xp(member, guild_id, VOICE_XP, channel)
+                
+        # Write the whole tick as one batch
+        if earners:
+            self.writer.request_flush()
+            
+        self.voice_stats = {
+            "members": sum(len(members) for members in earners.values()),
+            "ms": (time.perf_counter() - start) * 1000
+        }
+            
+    def level_up_message(self, level_ups):
+        if len(level_ups) == 1:
+            mention, level = level_ups[0]
+            description = f"Congratulations {mention}! You've reached level **{level}**!"
+        else:
+            # Several level-ups at once, list them in one embed
+            lines = [f"{mention} reached level **{level}**" for mention, level in level_ups[:25]]
+            if len(level_ups) > 25:
+                lines.append(f"...and {len(level_ups) - 25} more!")
+            description = "Congratulations!\n" + "\n".join(lines)
+            
+        embed = discord.Embed(
+            title="Level Up!",
+            description=description,
+            color=discord.Color.green()
+        )
+        return {"embed": embed}
 
     @app_commands.command(name="rank", description="Check your or someone else's rank")
     @app_commands.describe(member="The member to check (leave empty for yourself)")
@@ -105,13 +324,20 @@ class Levels(commands.Cog):
         user_id = str(member.id)
         guild_id = str(interaction.guild.id)
         
-        user_data = self.get_user_data(user_id, guild_id)
-        current_xp = user_data["xp"]
-        current_level = user_data["level"]
+        users = await self.guilds.load(guild_id)
+        # Members without a record aren't ranked, and looking them up
+        # mustn't create one
+        position = users.rank(user_id)
+        if position is None:
+            current_xp, current_level = 0, 0
+        else:
+            user_data = self.get_user_data(user_id, guild_id)
+            current_xp = user_data["xp"]
+            current_level = user_data["level"]
         
         # Calculate XP needed for next level
         next_level = current_level + 1
-        xp_needed = self.get_xp_for_level(next_level)
+        xp_needed = self.get_xp_for_level(next_level, guild_id)
         xp_progress = current_xp / xp_needed * 100 if xp_needed > 0 else 100
         
         # Create embed
@@ -120,6 +346,8 @@ class Levels(commands.Cog):
             color=member.color
         )
         
+        rank = f"#{position} of {len(users)}" if position is not None else "Unranked"
+        embed.add_field(name="Rank", value=rank, inline=True)
         embed.add_field(name="Level", value=current_level, inline=True)
         embed.add_field(name="XP", value=f"{current_xp}/{xp_needed}", inline=True)
         embed.add_field(name="Progress to Next Level", value=f"{xp_progress:.1f}%", inline=True)
@@ -129,45 +357,215 @@ class Levels(commands.Cog):
             
         await interaction.response.send_message(embed=embed)
 
-    @app_commands.command(name="leaderboard", description="Show the server XP leaderboard")
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.command(name="setlevelcurve", description="Change how much XP each level needs")
+    @app_commands.describe(
+        exponent="Level = (XP / scale) ^ exponent, lower values make later levels harder (default 0.3)",
+        scale="Divides XP before the exponent is applied, higher values slow down leveling (default 1)"
+    )
+    @app_commands.default_permissions(manage_guild=True)
+    async def set_level_curve(self, interaction: discord.Interaction,
+                              exponent: app_commands.Range[float, 0.1, 0.9] = 0.3,
+                              scale: app_commands.Range[int, 1, 1000] = 1):
         await interaction.response.defer()
         
         guild_id = str(interaction.guild.id)
+        curve = LevelCurve(exponent, scale)
+        if exponent == 0.3 and scale == 1:
+            self.curves.pop(guild_id, None)
+            self.curve_repo.remove(guild_id, "curve")
+        else:
+            self.curves[guild_id] = curve
+            self.curve_repo.save(guild_id, "curve", curve.to_dict())
+            
+        # Recompute every member's level with the new curve
+        users = await self.guilds.load(guild_id)
+        changed = self.recompute_guild_levels(guild_id, users)
+            
+        await interaction.followup.send(
+            f"Level curve set to exponent {exponent} and scale {scale}. "
+            f"{changed} member(s) changed level."
+        )
+
+    def recompute_guild_levels(self, guild_id, users):
+        changed = users.recompute_levels(self.get_curve(guild_id))
+        for user_id in changed:
+            self.save_user_data(user_id, guild_id)
+        return len(changed)
+
+    @app_commands.command(name="recomputelevels", description="Recalculate every member's level from their XP")
+    @app_commands.default_permissions(manage_guild=True)
+    async def recompute_levels(self, interaction: discord.Interaction):
+        await interaction.response.defer()
         
-        if guild_id not in self.levels or not self.levels[guild_id]:
-            await interaction.followup.send("No one has earned XP on this server yet!")
+        guild_id = str(interaction.guild.id)
+        users = await self.guilds.load(guild_id)
+        changed = self.recompute_guild_levels(guild_id, users)
+        
+        await interaction.followup.send(f"Recalculated {len(users)} member(s), {changed} changed level.")
+
+    @app_commands.command(name="exportxp", description="Download this server's XP table")
+    @app_commands.describe(format="File format (default csv)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def export_xp(self, interaction: discord.Interaction, format: Literal["csv", "ndjson"] = "csv"):
+        await interaction.response.defer(ephemeral=True)
+        
+        guild_id = str(interaction.guild.id)
+        users = await self.guilds.load(guild_id)
+        if not users:
+            await interaction.followup.send("No one has earned XP on this server yet!", ephemeral=True)
             return
             
-        # Sort users by XP
-        sorted_users = sorted(
-            self.levels[guild_id].items(),
-            key=lambda x: x[1]["xp"],
-            reverse=True
-        )
+        # Copy the columns so XP can keep changing while the file is written,
+        # rows are then streamed to disk on a worker thread in rank order
+        order, user_ids, xp, level = users.order[:], users.user_ids[:], users.xp[:], users.level[:]
+        rows = ((user_ids[row], xp[row], level[row]) for row in order)
+        
+        fd, path = tempfile.mkstemp(suffix=f".{format}")
+        os.close(fd)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, write_table, path, format, rows)
+            
+            if os.path.getsize(path) > interaction.guild.filesize_limit:
+                await interaction.followup.send("The XP table is too large to upload here.", ephemeral=True)
+                return
+                
+            await interaction.followup.send(
+                f"XP table for {len(order)} member(s):",
+                file=discord.File(path, filename=f"xp-{guild_id}.{format}"),
+                ephemeral=True
+            )
+        finally:
+            os.remove(path)
+
+    @app_commands.command(name="importxp", description="Set members' XP from a CSV or NDJSON file")
+    @app_commands.describe(file="A file in the format produced by /exportxp (only user_id and xp are used)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def import_xp(self, interaction: discord.Interaction, file: discord.Attachment):
+        await interaction.response.defer(ephemeral=True)
         
-        # Take top 10
-        top_users = sorted_users[:10]
+        guild_id = str(interaction.guild.id)
+        loop = asyncio.get_running_loop()
+        imported = 0
+        reader = None
         
-        # Create embed
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            await file.save(path)
+            reader = await loop.run_in_executor(None, TableReader, path)
+            
+            # Parse a chunk on a worker thread, then apply it in one go
+            while True:
+                chunk = await loop.run_in_executor(None, reader.read, 5000)
+                if not chunk:
+                    break
+                    
+                users = await self.guilds.load(guild_id)
+                curve = self.get_curve(guild_id)
+                deltas = []
+                for user_id, xp in chunk:
+                    user_data = users.get(user_id)
+                    if xp != user_data["xp"]:
+                        deltas.append((guild_id, user_id, xp - user_data["xp"]))
+                    user_data["xp"] = xp
+                    user_data["level"] = curve.level(xp)
+                    self.save_user_data(user_id, guild_id)
+                    imported += 1
+                    
+                # Journaled as deltas, so an import survives a crash like any award
+                self.journal.append_many(deltas)
+        except (UnicodeDecodeError, discord.HTTPException) as e:
+            await interaction.followup.send(f"Error reading the file: {e}", ephemeral=True)
+            return
+        finally:
+            if reader:
+                reader.close()
+            os.remove(path)
+            
+        await interaction.followup.send(
+            f"Imported XP for {imported} member(s), {reader.skipped} row(s) skipped.",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="setlevelchannel", description="Set the channel for level-up messages")
+    @app_commands.describe(channel="The channel to announce level-ups in (leave empty to announce where members chat)")
+    @app_commands.default_permissions(manage_guild=True)
+    async def set_level_channel(self, interaction: discord.Interaction, channel: discord.TextChannel = None):
+        guild_id = str(interaction.guild.id)
+        
+        if channel is None:
+            self.level_channels.pop(guild_id, None)
+            self.channel_repo.remove(guild_id, "channel")
+            await interaction.response.send_message("Level-ups will be announced where members chat.")
+            return
+            
+        self.level_channels[guild_id] = str(channel.id)
+        self.channel_repo.save(guild_id, "channel", str(channel.id))
+        await interaction.response.send_message(f"Level-up channel set to {channel.mention}!")
+
+    def page_count(self, users):
+        return max(1, -(-len(users) // LEADERBOARD_PAGE_SIZE))
+
+    def leaderboard_page(self, guild, users, page):
+        """(name, value) field pairs for one page, cached until the guild's ranking changes"""
+        guild_id = str(guild.id)
+        cached = self.leaderboard_pages.get(guild_id)
+        if cached is None or cached[0] != users.version:
+            cached = (users.version, {})
+            self.leaderboard_pages[guild_id] = cached
+        self.leaderboard_pages.move_to_end(guild_id)
+        while len(self.leaderboard_pages) > 100:
+            self.leaderboard_pages.popitem(last=False)
+
+        pages = cached[1]
+        if page not in pages:
+            # Users are kept sorted by XP, so a page is just a slice
+            start = page * LEADERBOARD_PAGE_SIZE
+            fields = []
+            for i, (user_id, data) in enumerate(users.top(LEADERBOARD_PAGE_SIZE, start), start + 1):
+                # Try to get the user
+                user = guild.get_member(user_id)
+                name = user.display_name if user else f"Unknown User ({user_id})"
+                fields.append((f"{i}. {name}", f"Level: {data['level']} | XP: {data['xp']}"))
+            pages[page] = fields
+        return pages[page]
+
+    def leaderboard_embed(self, guild, users, page):
         embed = discord.Embed(
-            title=f"XP Leaderboard for {interaction.guild.name}",
+            title=f"XP Leaderboard for {guild.name}",
             color=discord.Color.gold()
         )
         
         # Add fields for each user
-        for i, (user_id, data) in enumerate(top_users, 1):
-            # Try to get the user
-            user = interaction.guild.get_member(int(user_id))
-            name = user.display_name if user else f"Unknown User ({user_id})"
-            
-            embed.add_field(
-                name=f"{i}. {name}",
-                value=f"Level: {data['level']} | XP: {data['xp']}",
-                inline=False
-            )
+        for name, value in self.leaderboard_page(guild, users, page):
+            embed.add_field(name=name, value=value, inline=False)
+            
+        embed.set_footer(text=f"Page {page + 1}/{self.page_count(users)}")
+        return embed
+
+    @app_commands.command(name="leaderboard", description="Show the server XP leaderboard")
+    @app_commands.describe(page="The page to start on")
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
+        await interaction.response.defer()
+        
+        guild_id = str(interaction.guild.id)
+        users = await self.guilds.load(guild_id)
+        
+        if not users:
+            await interaction.followup.send("No one has earned XP on this server yet!")
+            return
+            
+        page = max(0, min(page - 1, self.page_count(users) - 1))
+        embed = self.leaderboard_embed(interaction.guild, users, page)
+        
+        # Single page leaderboards don't need buttons
+        if self.page_count(users) == 1:
+            await interaction.followup.send(embed=embed)
+            return
             
-        await interaction.followup.send(embed=embed)
+        view = LeaderboardView(self, interaction.guild, interaction.user.id, page)
+        view.update_buttons(users)
+        view.message = await interaction.followup.send(embed=embed, view=view, wait=True)
 
 async def setup(bot):
     await bot.add_cog(Levels(bot)) 
\ No newline at end of file
@@ -63,19 +63,26 @@ class Moderation(commands.Cog):
     @app_commands.default_permissions(manage_roles=True)
     async def mute(self, interaction: discord.Interaction, member: discord.Member, reason: str = None):
         muted_role = discord.utils.get(interaction.guild.roles, name="Muted")
+        # A manual mute has no end, drop any pending AutoMod unmute
+        self.cancel_scheduled_unmute(member)
         
         if not muted_role:
             # Defer the response as creating a role might take some time
             await interaction.response.defer(ephemeral=True)
+            status = await interaction.followup.send("Setting up the Muted role...", ephemeral=True, wait=True)
             
+            async def progress(done, total):
+                # Editing on every channel would hit rate limits
+                if done % 25 == 0 and done < total:
+                    await status.edit(content=f"Setting up the Muted role... {done}/{total} channels")
+                    
             # Create the muted role
-            muted_role = await interaction.guild.create_role(name="Muted")
-            for channel in interaction.guild.channels:
-                await channel.set_permissions(muted_role, speak=False, send_messages=False)
+            muted_role, updated, failed = await self.bot.muted_roles.provision(interaction.guild, progress=progress)
                 
             # Add the role to the member
             await member.add_roles(muted_role, reason=reason)
-            await interaction.followup.send(f'Created Muted role and muted {member.mention} for {reason}')
+            summary = f" ({failed} channel(s) couldn't be updated)" if failed else ""
+            await status.edit(content=f'Created Muted role and muted {member.mention} for {reason}{summary}')
         else:
             # Add the role to the member
             await member.add_roles(muted_role, reason=reason)
@@ -91,7 +98,30 @@ class Moderation(commands.Cog):
             return
             
         await member.remove_roles(muted_role)
+        self.cancel_scheduled_unmute(member)
         await interaction.response.send_message(f'Unmuted {member.mention}')
+        
+    @app_commands.command(name="setupmuterole", description="Create the Muted role or fix its permissions in every channel")
+    @app_commands.default_permissions(manage_roles=True)
+    async def setup_mute_role(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        status = await interaction.followup.send("Checking channels...", ephemeral=True, wait=True)
+        
+        async def progress(done, total):
+            if done % 25 == 0 and done < total:
+                await status.edit(content=f"Updating channels... {done}/{total}")
+                
+        # Channels that are already set up are skipped
+        muted_role, updated, failed = await self.bot.muted_roles.provision(interaction.guild, progress=progress)
+        summary = f"{muted_role.mention} is set up. Updated {updated} channel(s)"
+        if failed:
+            summary += f", {failed} couldn't be updated"
+        await status.edit(content=summary + ".")
+        
+    def cancel_scheduled_unmute(self, member):
+        automod = self.bot.get_cog("AutoMod")
+        if automod:
+            automod.scheduler.cancel(member.guild.id, f"unmute:{member.id}")
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot)) 
\ No newline at end of file
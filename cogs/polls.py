@@ -1,8 +1,6 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 import asyncio
 from datetime import datetime, timedelta
 
@@ -10,34 +8,28 @@ class Polls(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.active_polls = {}
-        self.load_active_polls()
-        
-    def load_active_polls(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
+        self.repo = bot.storage.repository("polls")
         
+    async def load_active_polls(self):
         try:
-            if os.path.exists('data/polls.json'):
-                with open('data/polls.json', 'r') as f:
-                    data = json.load(f)
-                    
-                    # Convert string keys to int (Discord IDs are stored as strings in JSON)
-                    self.active_polls = {int(k): v for k, v in data.items()}
+            # Move data over from the old JSON file on first run
+            await self.repo.import_legacy(
+                'data/polls.json',
+                lambda data: (("", poll_id, poll_data) for poll_id, poll_data in data.items())
+            )
+            
+            # Convert string keys to int (Discord IDs are stored as strings in the database)
+            self.active_polls = {int(k): v for k, v in (await self.repo.load_scope("")).items()}
         except Exception as e:
             print(f"Error loading polls data: {e}")
             self.active_polls = {}
     
-    def save_active_polls(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            
-        try:
-            with open('data/polls.json', 'w') as f:
-                # Convert int keys to strings for JSON serialization
-                data = {str(k): v for k, v in self.active_polls.items()}
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving polls data: {e}")
+    def save_poll(self, poll_id):
+        # Queued and written on the storage thread
+        self.repo.save("", poll_id, self.active_polls[poll_id])
+    
+    def delete_poll(self, poll_id):
+        self.repo.remove("", poll_id)
     
     @app_commands.command(name="poll", description="Create a simple poll with up to 9 options")
     @app_commands.describe(
@@ -102,7 +94,7 @@ class Polls(commands.Cog):
             'creator_id': interaction.user.id
         }
         
-        self.save_active_polls()
+        self.save_poll(poll_message.id)
         
         # Schedule the poll to end
         self.bot.loop.create_task(self.end_poll_after(poll_message.id, duration * 60))
@@ -151,7 +143,7 @@ class Polls(commands.Cog):
             'creator_id': interaction.user.id
         }
         
-        self.save_active_polls()
+        self.save_poll(poll_message.id)
         
         # Schedule the poll to end
         self.bot.loop.create_task(self.end_poll_after(poll_message.id, duration * 60))
@@ -237,17 +229,18 @@ class Polls(commands.Cog):
             
             # Remove from active polls
             del self.active_polls[poll_id]
-            self.save_active_polls()
+            self.delete_poll(poll_id)
             
         except Exception as e:
             print(f"Error ending poll {poll_id}: {e}")
             # Clean up if we couldn't process it
             if poll_id in self.active_polls:
                 del self.active_polls[poll_id]
-                self.save_active_polls()
+                self.delete_poll(poll_id)
                 
     async def cog_load(self):
         """Tasks to run when the cog is loaded"""
+        await self.load_active_polls()
         self.bot.loop.create_task(self.check_expired_polls())
         
     async def check_expired_polls(self):
@@ -1,46 +1,40 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 from typing import Optional
 
 class ReactionRoles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.reaction_roles = {}
-        self.load_reaction_roles()
+        self.repo = bot.storage.repository("reaction_roles")
         
-    def load_reaction_roles(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
+    async def cog_load(self):
+        """Tasks to run when the cog is loaded"""
+        await self.load_reaction_roles()
         
+    async def load_reaction_roles(self):
         try:
-            if os.path.exists('data/reaction_roles.json'):
-                with open('data/reaction_roles.json', 'r') as f:
-                    data = json.load(f)
-                    
-                    # Convert string keys to int (Discord IDs are stored as strings in JSON)
-                    self.reaction_roles = {int(k): {int(msg_id): {emoji: int(role_id) for emoji, role_id in roles.items()} 
-                                         for msg_id, roles in v.items()} 
-                                for k, v in data.items()}
+            # Move data over from the old JSON file on first run
+            await self.repo.import_legacy(
+                'data/reaction_roles.json',
+                lambda data: ((guild_id, msg_id, roles)
+                              for guild_id, messages in data.items()
+                              for msg_id, roles in messages.items())
+            )
+            
+            # Convert string keys to int (Discord IDs are stored as strings in the database)
+            self.reaction_roles = {int(k): {int(msg_id): {emoji: int(role_id) for emoji, role_id in roles.items()} 
+                                     for msg_id, roles in v.items()} 
+                            for k, v in (await self.repo.load_all()).items()}
         except Exception as e:
             print(f"Error loading reaction roles data: {e}")
             self.reaction_roles = {}
     
-    def save_reaction_roles(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            
-        try:
-            with open('data/reaction_roles.json', 'w') as f:
-                # Convert int keys to strings for JSON serialization
-                data = {str(k): {str(msg_id): {emoji: str(role_id) for emoji, role_id in roles.items()} 
-                               for msg_id, roles in v.items()} 
-                      for k, v in self.reaction_roles.items()}
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving reaction roles data: {e}")
+    def save_reaction_message(self, guild_id, message_id):
+        # Queued and written on the storage thread
+        roles = self.reaction_roles[guild_id][message_id]
+        self.repo.save(guild_id, message_id, {emoji: str(role_id) for emoji, role_id in roles.items()})
     
     @app_commands.command(name="reactionrole", description="Create a reaction role message")
     @app_commands.describe(
@@ -71,7 +65,7 @@ class ReactionRoles(commands.Cog):
             self.reaction_roles[guild_id] = {}
             
         self.reaction_roles[guild_id][message.id] = {}
-        self.save_reaction_roles()
+        self.save_reaction_message(guild_id, message.id)
     
     @app_commands.command(name="addrole", description="Add a role to a reaction role message")
     @app_commands.describe(
@@ -136,7 +130,7 @@ class ReactionRoles(commands.Cog):
             
             # Save the role in our system
             self.reaction_roles[guild_id][msg_id][emoji] = role.id
-            self.save_reaction_roles()
+            self.save_reaction_message(guild_id, msg_id)
             
             await interaction.response.send_message(
                 f"Added {role.name} with {emoji} to the reaction role message.", 
@@ -213,7 +207,7 @@ class ReactionRoles(commands.Cog):
             
             # Remove the role from our system
             del self.reaction_roles[guild_id][msg_id][emoji]
-            self.save_reaction_roles()
+            self.save_reaction_message(guild_id, msg_id)
             
             await interaction.response.send_message(
                 f"Removed {role_name} with {emoji} from the reaction role message.", 
@@ -300,7 +294,7 @@ class ReactionRoles(commands.Cog):
             if not role:
                 # Role was deleted, clean up
                 del self.reaction_roles[guild_id][message_id][emoji]
-                self.save_reaction_roles()
+                self.save_reaction_message(guild_id, message_id)
                 return
             
             # Add the role to the member
@@ -346,7 +340,7 @@ class ReactionRoles(commands.Cog):
             if not role:
                 # Role was deleted, clean up
                 del self.reaction_roles[guild_id][message_id][emoji]
-                self.save_reaction_roles()
+                self.save_reaction_message(guild_id, message_id)
                 return
             
             # Remove the role from the member
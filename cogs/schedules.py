@@ -1,8 +1,6 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 import asyncio
 from datetime import datetime, timedelta
 import re
@@ -12,36 +10,31 @@ class Schedules(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.schedules = {}
-        self.load_schedules()
-        
-    def load_schedules(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
+        self.repo = bot.storage.repository("schedules")
         
+    async def load_schedules(self):
         try:
-            if os.path.exists('data/schedules.json'):
-                with open('data/schedules.json', 'r') as f:
-                    data = json.load(f)
-                    
-                    # Convert string keys to int (Discord IDs are stored as strings in JSON)
-                    self.schedules = {int(k): {int(s_id): s_data for s_id, s_data in v.items()} 
-                                    for k, v in data.items()}
+            # Move data over from the old JSON file on first run
+            await self.repo.import_legacy(
+                'data/schedules.json',
+                lambda data: ((guild_id, s_id, s_data)
+                              for guild_id, guild_schedules in data.items()
+                              for s_id, s_data in guild_schedules.items())
+            )
+            
+            # Convert string keys to int (Discord IDs are stored as strings in the database)
+            self.schedules = {int(k): {int(s_id): s_data for s_id, s_data in v.items()} 
+                            for k, v in (await self.repo.load_all()).items()}
         except Exception as e:
             print(f"Error loading schedules data: {e}")
             self.schedules = {}
     
-    def save_schedules(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            
-        try:
-            with open('data/schedules.json', 'w') as f:
-                # Convert int keys to strings for JSON serialization
-                data = {str(k): {str(s_id): s_data for s_id, s_data in v.items()} 
-                      for k, v in self.schedules.items()}
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving schedules data: {e}")
+    def save_schedule(self, guild_id, schedule_id):
+        # Queued and written on the storage thread
+        self.repo.save(guild_id, schedule_id, self.schedules[guild_id][schedule_id])
+    
+    def delete_schedule(self, guild_id, schedule_id):
+        self.repo.remove(guild_id, schedule_id)
     
     def parse_time(self, time_str):
         """Parse a time string into a datetime object"""
@@ -157,7 +150,7 @@ class Schedules(commands.Cog):
         
         # Store the schedule
         self.schedules[guild_id][schedule_id] = schedule_data
-        self.save_schedules()
+        self.save_schedule(guild_id, schedule_id)
         
         # Schedule the message
         if not schedule_data['repeat']:
@@ -313,7 +306,7 @@ class Schedules(commands.Cog):
             if not self.schedules[guild_id]:
                 del self.schedules[guild_id]
                 
-            self.save_schedules()
+            self.delete_schedule(guild_id, s_id)
             
             await interaction.response.send_message(
                 f"Schedule {s_id} has been cancelled successfully.", 
@@ -359,7 +352,7 @@ class Schedules(commands.Cog):
                 # Update next run time
                 next_run = datetime.now() + timedelta(seconds=schedule_data['interval'])
                 schedule_data['next_run'] = next_run.isoformat()
-                self.save_schedules()
+                self.save_schedule(guild_id, schedule_id)
                 
                 # Schedule the next run
                 self.bot.loop.create_task(
@@ -373,13 +366,14 @@ class Schedules(commands.Cog):
                 if not self.schedules[guild_id]:
                     del self.schedules[guild_id]
                     
-                self.save_schedules()
+                self.delete_schedule(guild_id, schedule_id)
                 
         except Exception as e:
             print(f"Error sending scheduled message {schedule_id}: {e}")
     
     async def cog_load(self):
         """Tasks to run when the cog is loaded"""
+        await self.load_schedules()
         self.bot.loop.create_task(self.restart_schedules())
         
     async def restart_schedules(self):
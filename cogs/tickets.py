@@ -1,8 +1,6 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
 import asyncio
 from datetime import datetime
 from typing import Optional
@@ -28,32 +26,30 @@ class Tickets(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = {}
-        self.load_config()
+        self.repo = bot.storage.repository("tickets")
         
         # Register persistent view
         self.bot.add_view(TicketView(bot))
         
-    def load_config(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
+    async def cog_load(self):
+        """Tasks to run when the cog is loaded"""
+        await self.load_config()
         
+    async def load_config(self):
         try:
-            if os.path.exists('data/tickets.json'):
-                with open('data/tickets.json', 'r') as f:
-                    self.config = json.load(f)
+            # Move data over from the old JSON file on first run
+            await self.repo.import_legacy(
+                'data/tickets.json',
+                lambda data: ((guild_id, "config", config) for guild_id, config in data.items())
+            )
+            self.config = {guild_id: records["config"] for guild_id, records in (await self.repo.load_all()).items()}
         except Exception as e:
             print(f"Error loading tickets config: {e}")
             self.config = {}
     
-    def save_config(self):
-        if not os.path.exists('data'):
-            os.makedirs('data')
-            
-        try:
-            with open('data/tickets.json', 'w') as f:
-                json.dump(self.config, f, indent=4)
-        except Exception as e:
-            print(f"Error saving tickets config: {e}")
+    def save_config(self, guild_id):
+        # Queued and written on the storage thread
+        self.repo.save(guild_id, "config", self.config[guild_id])
     
     @app_commands.command(name="ticketpanel", description="Create a ticket panel for users to open support tickets")
     @app_commands.describe(
@@ -93,7 +89,7 @@ class Tickets(commands.Cog):
                 'ticket_welcome_message': "Support will be with you shortly. Please describe your issue in detail."
             }
             
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.followup.send("Ticket panel has been created successfully!", ephemeral=True)
     
@@ -126,7 +122,7 @@ class Tickets(commands.Cog):
         if log_channel:
             self.config[guild_id]['ticket_log'] = log_channel.id
             
-        self.save_config()
+        self.save_config(guild_id)
         
         # Build response message
         response = ["Ticket system configuration updated:"]
@@ -169,7 +165,7 @@ class Tickets(commands.Cog):
             
         # Add the role to support roles
         self.config[guild_id]['support_roles'].append(role.id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.followup.send(f"Added {role.mention} to the support team.", ephemeral=True)
     
@@ -200,7 +196,7 @@ class Tickets(commands.Cog):
             
         # Remove the role from support roles
         self.config[guild_id]['support_roles'].remove(role.id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.followup.send(f"Removed {role.mention} from the support team.", ephemeral=True)
     
@@ -228,7 +224,7 @@ class Tickets(commands.Cog):
                 try:
                     category = await interaction.guild.create_category("Tickets")
                     self.config[guild_id]['ticket_category'] = category.id
-                    self.save_config()
+                    self.save_config(guild_id)
                 except:
                     await interaction.followup.send("Failed to create ticket category. Please set one with `/ticketsetup`.", ephemeral=True)
                     return
@@ -242,7 +238,7 @@ class Tickets(commands.Cog):
         # Increment ticket count
         self.config[guild_id]['ticket_count'] += 1
         ticket_num = self.config[guild_id]['ticket_count']
-        self.save_config()
+        self.save_config(guild_id)
         
         # Create permissions for the channel
         overwrites = {
@@ -13,6 +13,7 @@ class Utility(commands.Cog):
         self.bot = bot
         load_dotenv()  # Load environment variables
         self.weather_api_key = os.getenv('OPENWEATHER_API_KEY', 'YOUR_API_KEY')
+        self.owner_id = os.getenv('BOT_OWNER_ID')
 
     @app_commands.command(name="ping", description="Check the bot's latency")
     async def ping(self, interaction: discord.Interaction):
@@ -119,6 +120,42 @@ class Utility(commands.Cog):
                 else:
                     await interaction.followup.send("Couldn't fetch weather information. Please try again later!")
 
+    @app_commands.command(name="botstats", description="Show internal performance statistics (bot owner only)")
+    async def botstats(self, interaction: discord.Interaction):
+        if str(interaction.user.id) != self.owner_id:
+            await interaction.response.send_message("Only the bot owner can use this command.", ephemeral=True)
+            return
+            
+        embed = discord.Embed(
+            title="Bot Statistics",
+            color=discord.Color.blue()
+        )
+        
+        # Database save latency
+        stats = self.bot.storage.latency_stats()
+        embed.add_field(
+            name="Storage",
+            value=f"Writes: {stats['writes']}\n"
+                  f"Avg: {stats['avg_ms']:.2f}ms | Max: {stats['max_ms']:.2f}ms | Last: {stats['last_ms']:.2f}ms\n"
+                  f"Queued records: {stats['pending']}",
+            inline=False
+        )
+        
+        # Time spent in each message pipeline stage
+        pipeline = self.bot.pipeline.stats()
+        lines = [f"Messages: {pipeline['messages']} | Stopped early: {pipeline['stopped']}"]
+        for stage in pipeline["stages"]:
+            lines.append(f"{stage['name']}: {stage['calls']} calls | "
+                         f"Avg: {stage['avg_ms']:.2f}ms | Max: {stage['max_ms']:.2f}ms")
+        embed.add_field(name="Message Pipeline", value="\n".join(lines), inline=False)
+        
+        # Cogs can report their own numbers by defining perf_stats()
+        for cog in self.bot.cogs.values():
+            if hasattr(cog, "perf_stats"):
+                embed.add_field(name=cog.qualified_name, value=cog.perf_stats(), inline=False)
+                
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @app_commands.command(name="help", description="Shows a list of available commands and features")
     async def help(self, interaction: discord.Interaction, category: Optional[str] = None):
         if category is None:
@@ -161,6 +198,7 @@ class Utility(commands.Cog):
                 embed.add_field(name="/clear", value="Clear a specified number of messages", inline=False)
                 embed.add_field(name="/mute", value="Mute a member", inline=False)
                 embed.add_field(name="/unmute", value="Unmute a member", inline=False)
+                embed.add_field(name="/setupmuterole", value="Create the Muted role or fix its channel permissions", inline=False)
                 
             elif category in ["fun"]:
                 embed = discord.Embed(
@@ -185,6 +223,7 @@ class Utility(commands.Cog):
                 embed.add_field(name="/userinfo", value="Display user information", inline=False)
                 embed.add_field(name="/time", value="Get current time", inline=False)
                 embed.add_field(name="/weather", value="Get weather information", inline=False)
+                embed.add_field(name="/botstats", value="Show internal performance statistics (bot owner only)", inline=False)
                 
             elif category in ["level", "levels", "leveling", "xp"]:
                 embed = discord.Embed(
@@ -194,6 +233,11 @@ class Utility(commands.Cog):
                 )
                 embed.add_field(name="/rank", value="Check your or someone else's level and XP", inline=False)
                 embed.add_field(name="/leaderboard", value="View the server's XP leaderboard", inline=False)
+                embed.add_field(name="/setlevelcurve", value="Change how much XP each level needs", inline=False)
+                embed.add_field(name="/setlevelchannel", value="Set the channel for level-up messages", inline=False)
+                embed.add_field(name="/recomputelevels", value="Recalculate every member's level from their XP", inline=False)
+                embed.add_field(name="/exportxp", value="Download the server's XP table as CSV or NDJSON", inline=False)
+                embed.add_field(name="/importxp", value="Set members' XP from a CSV or NDJSON file", inline=False)
                 
             elif category in ["welcome", "welcomesystem"]:
                 embed = discord.Embed(
@@ -216,6 +260,10 @@ class Utility(commands.Cog):
                 )
                 embed.add_field(name="/automod", value="Toggle auto-moderation", inline=False)
                 embed.add_field(name="/automodlog", value="Set logging channel", inline=False)
+                embed.add_field(name="/automodpunishment", value="Set the punishment and duration for a check", inline=False)
+                embed.add_field(name="/antiraid", value="Configure raid detection on member joins (each kick or ban is a separate API call)", inline=False)
+                embed.add_field(name="/duplicatefilter", value="Configure detection of the same message sent by many members", inline=False)
+                embed.add_field(name="/endraid", value="End raid mode and turn invites back on", inline=False)
                 embed.add_field(name="/addfilterword", value="Add words to filter", inline=False)
                 embed.add_field(name="/removefilterword", value="Remove words from filter", inline=False)
                 embed.add_field(name="/filterwords", value="List filtered words", inline=False)
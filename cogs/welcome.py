@@ -1,39 +1,37 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
+from utils.guildcache import GuildCache
 from datetime import datetime
 
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.config_file = "data/welcome_config.json"
-        self.ensure_data_folder()
-        self.config = self.load_config()
-        
-    def ensure_data_folder(self):
-        if not os.path.exists("data"):
-            os.makedirs("data")
-        if not os.path.exists(self.config_file):
-            with open(self.config_file, "w") as f:
-                json.dump({}, f)
-                
-    def load_config(self):
-        try:
-            with open(self.config_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
+        self.legacy_file = "data/welcome_config.json"
+        self.repo = bot.storage.repository("welcome")
+        # Guild configs are loaded on first use and dropped again when idle
+        self.guilds = GuildCache(self.repo)
+        
+    async def cog_load(self):
+        # Move data over from the old JSON file on first run
+        await self.repo.import_legacy(
+            self.legacy_file,
+            lambda data: ((guild_id, "config", config) for guild_id, config in data.items())
+        )
+        self.guilds.start()
+        
+    async def cog_unload(self):
+        await self.guilds.stop()
             
-    def save_config(self):
-        with open(self.config_file, "w") as f:
-            json.dump(self.config, f, indent=4)
+    def save_config(self, guild_id):
+        # Queued and written on the storage thread
+        self.repo.save(guild_id, "config", self.guilds.get(guild_id)["config"])
             
-    def get_guild_config(self, guild_id):
+    async def get_guild_config(self, guild_id):
         guild_id = str(guild_id)
-        if guild_id not in self.config:
-            self.config[guild_id] = {
+        records = await self.guilds.load(guild_id)
+        if "config" not in records:
+            records["config"] = {
                 "welcome_channel": None,
                 "welcome_message": "Welcome {user} to {server}! You are member #{count}.",
                 "goodbye_channel": None,
@@ -41,13 +39,18 @@ class Welcome(commands.Cog):
                 "welcome_dm": False,
                 "welcome_dm_message": "Welcome to {server}! We hope you enjoy your stay."
             }
-            self.save_config()
-        return self.config[guild_id]
+            self.save_config(guild_id)
+        return records["config"]
             
     @commands.Cog.listener()
     async def on_member_join(self, member):
+        # Members joining in a raid aren't welcomed one by one
+        automod = self.bot.get_cog("AutoMod")
+        if automod and await automod.record_join(member):
+            return
+            
         guild_id = str(member.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         # Skip if welcome channel is not set
         if not config["welcome_channel"]:
@@ -101,8 +104,13 @@ class Welcome(commands.Cog):
                 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
+        # Raid members being removed don't get goodbyes
+        automod = self.bot.get_cog("AutoMod")
+        if automod and automod.raid_active(member.guild.id):
+            return
+            
         guild_id = str(member.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         # Skip if goodbye channel is not set
         if not config["goodbye_channel"]:
@@ -146,10 +154,10 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def set_welcome_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["welcome_channel"] = str(channel.id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"Welcome channel set to {channel.mention}!")
         
@@ -158,10 +166,10 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def set_goodbye_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["goodbye_channel"] = str(channel.id)
-        self.save_config()
+        self.save_config(guild_id)
         
         await interaction.response.send_message(f"Goodbye channel set to {channel.mention}!")
         
@@ -170,10 +178,10 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def set_welcome_message(self, interaction: discord.Interaction, message: str):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["welcome_message"] = message
-        self.save_config()
+        self.save_config(guild_id)
         
         # Preview the message
         preview = message.format(
@@ -189,10 +197,10 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def set_goodbye_message(self, interaction: discord.Interaction, message: str):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["goodbye_message"] = message
-        self.save_config()
+        self.save_config(guild_id)
         
         # Preview the message
         preview = message.format(
@@ -206,10 +214,10 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def toggle_welcome_dm(self, interaction: discord.Interaction):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["welcome_dm"] = not config["welcome_dm"]
-        self.save_config()
+        self.save_config(guild_id)
         
         status = "enabled" if config["welcome_dm"] else "disabled"
         await interaction.response.send_message(f"Welcome DMs {status}!")
@@ -219,10 +227,10 @@ class Welcome(commands.Cog):
     @app_commands.default_permissions(manage_guild=True)
     async def set_welcome_dm_message(self, interaction: discord.Interaction, message: str):
         guild_id = str(interaction.guild.id)
-        config = self.get_guild_config(guild_id)
+        config = await self.get_guild_config(guild_id)
         
         config["welcome_dm_message"] = message
-        self.save_config()
+        self.save_config(guild_id)
         
         # Preview the message
         preview = message.format(
@@ -0,0 +1 @@
+"""Shared helpers used by the cogs (kept outside cogs/ so they aren't loaded as extensions)."""
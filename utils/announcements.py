@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import discord
+
+
+class AnnouncementQueue:
+    """Merges announcements per channel and sends them as one message.
+
+    The first item queued for a channel opens a `window`-second window and
+    everything queued for that channel before it closes goes out in a
+    single send. Items sharing a key replace each other, so only the latest
+    one is announced; items queued with key None are all kept. Sends to a
+    channel are at least `min_interval` seconds apart, which keeps bursts
+    under Discord's per-channel rate limit.
+
+    With `leading` set, an item queued while the channel is quiet is sent
+    right away and only what follows within the interval is merged. With
+    `max_items` set, a window closes early once it holds that many items
+    and no send carries more than that.
+
+    `render` turns the list of items into the keyword arguments for
+    channel.send().
+    """
+
+    def __init__(self, render, window=2.0, min_interval=3.0, leading=False, max_items=None):
+        self.render = render
+        self.window = window
+        self.min_interval = min_interval
+        self.leading = leading
+        self.max_items = max_items
+        self.pending = {}  # channel id -> (channel, {key: item})
+        self.tasks = {}
+        self.full = {}  # channel id -> Event set when a window reaches max_items
+        self.queued = 0
+        self.sent = 0
+
+    def add(self, channel, key, item):
+        if channel.id not in self.pending:
+            self.pending[channel.id] = (channel, {})
+        items = self.pending[channel.id][1]
+        items[("item", self.queued) if key is None else key] = item
+        self.queued += 1
+
+        if channel.id not in self.tasks:
+            self.full[channel.id] = asyncio.Event()
+            self.tasks[channel.id] = asyncio.create_task(self.deliver(channel.id))
+        elif self.max_items and len(items) >= self.max_items:
+            self.full[channel.id].set()
+
+    async def collect(self, channel_id):
+        # Wait out the window, or until it fills up
+        full = self.full[channel_id]
+        if not (self.max_items and channel_id in self.pending
+                and len(self.pending[channel_id][1]) >= self.max_items):
+            # Not wait_for(), which swallows a cancel that lands just as the
+            # event is set and would leave stop() waiting forever
+            waiter = asyncio.ensure_future(full.wait())
+            try:
+                await asyncio.wait([waiter], timeout=self.window)
+            finally:
+                waiter.cancel()
+        full.clear()
+
+    async def deliver(self, channel_id):
+        last_sent = None
+        try:
+            while True:
+                if last_sent is not None or not self.leading:
+                    await self.collect(channel_id)
+                if last_sent is not None:
+                    # Hold on to the channel so the next batch respects its budget
+                    await asyncio.sleep(max(0, last_sent + self.min_interval - time.monotonic()))
+                if channel_id not in self.pending:
+                    break
+
+                channel, items = self.pending.pop(channel_id)
+                items = list(items.items())
+                if self.max_items and len(items) > self.max_items:
+                    # The rest waits for the next send
+                    self.pending[channel_id] = (channel, dict(items[self.max_items:]))
+                    items = items[:self.max_items]
+                try:
+                    await channel.send(**self.render([item for key, item in items]))
+                    self.sent += 1
+                except discord.HTTPException as e:
+                    print(f"Error sending announcement: {e}")
+                last_sent = time.monotonic()
+        finally:
+            self.tasks.pop(channel_id, None)
+            self.full.pop(channel_id, None)
+
+    def stats(self):
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "channels": len(self.tasks)
+        }
+
+    async def stop(self):
+        # Announcements still waiting are dropped
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks.clear()
+        self.full.clear()
+        self.pending.clear()
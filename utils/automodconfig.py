@@ -0,0 +1,159 @@
+from typing import NamedTuple, Optional
+
+from utils.wordfilter import WordMatcher
+
+# Default bad words list (can be customized per server)
+DEFAULT_BAD_WORDS = [
+    "badword1", "badword2", "badword3"  # Replace with actual bad words
+]
+
+# Message checks in the order they run
+CHECKS = ("anti_spam", "anti_mention", "word_filter", "invite_filter", "duplicate_filter")
+
+
+def default_config():
+    """A new guild's AutoMod settings, as stored"""
+    return {
+        "enabled": False,
+        "log_channel": None,
+        "anti_spam": {
+            "enabled": True,
+            "max_messages": 5,  # Max messages in time frame
+            "time_frame": 3,    # Time frame in seconds
+            "punishment": "mute",
+            "punishment_duration": 5  # Minutes
+        },
+        "anti_mention": {
+            "enabled": True,
+            "max_mentions": 5,  # Max mentions in a single message
+            "max_total_mentions": 15,  # Max mentions across messages in time frame
+            "time_frame": 30,  # Time frame in seconds
+            "punishment": "mute",
+            "punishment_duration": 5  # Minutes
+        },
+        "word_filter": {
+            "enabled": True,
+            "filtered_words": list(DEFAULT_BAD_WORDS),
+            "punishment": "delete",  # delete, warn, mute, timeout, kick, ban
+        },
+        "invite_filter": {
+            "enabled": True,
+            "allowed_servers": [],  # List of allowed server IDs
+            "punishment": "delete"
+        },
+        "duplicate_filter": {
+            "enabled": False,  # Opt-in with /duplicatefilter, common greetings can look like spam
+            "max_authors": 4,  # Flag a message once this many other members sent it in the time frame
+            "time_frame": 60,  # Time frame in seconds
+            "similarity": 0.6,  # How close counts as the same message, 0 to 1
+            "punishment": "delete"
+        },
+        "anti_raid": {
+            "enabled": False,  # Opt-in with /antiraid, it kicks members and pauses invites
+            "max_joins": 10,  # Joins in the time frame that start a raid
+            "time_frame": 10,  # Time frame in seconds
+            "min_account_age": 7,  # Days, newer accounts joining in a raid get the action
+            "action": "kick",  # none, kick, ban
+            "lockdown": True,  # Pause invites during a raid
+            "quiet_time": 5  # Minutes without joins before a raid ends
+        }
+    }
+
+
+class SpamRule(NamedTuple):
+    enabled: bool
+    punishment: str
+    punishment_duration: int
+    max_messages: int
+    time_frame: float
+
+
+class MentionRule(NamedTuple):
+    enabled: bool
+    punishment: str
+    punishment_duration: int
+    max_mentions: int
+    max_total_mentions: int
+    time_frame: float
+
+
+class WordRule(NamedTuple):
+    enabled: bool
+    punishment: str
+    punishment_duration: int
+    matcher: WordMatcher
+
+
+class InviteRule(NamedTuple):
+    enabled: bool
+    punishment: str
+    punishment_duration: int
+    allowed_servers: frozenset
+
+
+class DuplicateRule(NamedTuple):
+    enabled: bool
+    punishment: str
+    punishment_duration: int
+    max_authors: int
+    time_frame: float
+    similarity: float
+
+
+class RaidRule(NamedTuple):
+    enabled: bool
+    max_joins: int
+    time_frame: float
+    min_account_age: int
+    action: str
+    lockdown: bool
+    quiet_time: int
+
+
+RULES = {
+    "anti_spam": SpamRule,
+    "anti_mention": MentionRule,
+    "word_filter": WordRule,
+    "invite_filter": InviteRule,
+    "duplicate_filter": DuplicateRule,
+    "anti_raid": RaidRule
+}
+
+
+class GuildConfig(NamedTuple):
+    """A guild's AutoMod settings, read-only and ready for the message path.
+
+    Built from the stored dict by compile(): missing settings get their
+    defaults, the word list becomes a WordMatcher and `checks` lists the
+    enabled message checks as (name, rule) in the order they run. Build a
+    new one whenever the stored dict changes.
+    """
+    enabled: bool
+    log_channel: Optional[int]
+    checks: tuple
+    anti_spam: SpamRule
+    anti_mention: MentionRule
+    word_filter: WordRule
+    invite_filter: InviteRule
+    duplicate_filter: DuplicateRule
+    anti_raid: RaidRule
+
+    @classmethod
+    def compile(cls, config):
+        defaults = default_config()
+        rules = {}
+        for name, rule in RULES.items():
+            section = {"punishment_duration": 5, **defaults[name], **config.get(name, {})}
+            if name == "word_filter":
+                section["matcher"] = WordMatcher(section["filtered_words"])
+            elif name == "invite_filter":
+                section["allowed_servers"] = frozenset(section["allowed_servers"])
+            rules[name] = rule(**{field: section[field] for field in rule._fields})
+
+        log_channel = config.get("log_channel")
+        return cls(
+            enabled=config.get("enabled", False),
+            log_channel=int(log_channel) if log_channel else None,
+            checks=tuple((name, rules[name]) for name in CHECKS if rules[name].enabled),
+            **rules
+        )
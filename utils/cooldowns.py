@@ -0,0 +1,66 @@
+import heapq
+import time
+
+
+class CooldownStore:
+    """Per-key cooldowns that forget keys once they have expired.
+
+    Keys are tuples of ints such as (guild_id, user_id). Every key is filed
+    in a bucket for the `granularity`-second slot its cooldown ends in, and
+    whole buckets are dropped once their slot has passed. Memory therefore
+    follows the number of keys cooling down right now, not the number of
+    keys ever seen. Times come from time.monotonic().
+    """
+
+    def __init__(self, duration, granularity=1.0):
+        self.duration = duration
+        self.granularity = granularity
+        self.expires = {}
+        self.buckets = {}
+        self.slots = []  # Heap of bucket slots, oldest first
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self.expires)
+
+    def prune(self, now):
+        current = int(now // self.granularity)
+        while self.slots and self.slots[0] < current:
+            for key in self.buckets.pop(heapq.heappop(self.slots)):
+                # The key may have been started again since it was filed here
+                expires = self.expires.get(key)
+                if expires is not None and expires <= now:
+                    del self.expires[key]
+                    self.expired += 1
+
+    def trigger(self, key, now=None):
+        """Start a key's cooldown. Returns False if it was still cooling down."""
+        if now is None:
+            now = time.monotonic()
+        self.prune(now)
+
+        if self.expires.get(key, now) > now:
+            self.hits += 1
+            return False
+        self.misses += 1
+
+        expires = now + self.duration
+        self.expires[key] = expires
+        slot = int(expires // self.granularity)
+        if slot not in self.buckets:
+            self.buckets[slot] = []
+            heapq.heappush(self.slots, slot)
+        self.buckets[slot].append(key)
+        return True
+
+    def stats(self):
+        checks = self.hits + self.misses
+        return {
+            "size": len(self.expires),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / checks * 100 if checks else 0.0,
+            "expired": self.expired
+        }
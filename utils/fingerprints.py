@@ -0,0 +1,135 @@
+import re
+from collections import deque
+
+NON_WORD = re.compile(r"[\W_]+")
+
+
+class Fingerprinter:
+    """MinHash signatures for spotting near-identical messages.
+
+    A message is lowercased, stripped down to words and cut into
+    overlapping `shingle_size`-character pieces. The shingle hashes are
+    split over `num_hashes` bins by value and each bin keeps its smallest
+    (one-permutation MinHash), so the whole signature costs a single pass;
+    empty bins borrow from the next filled one. Only the low byte of each
+    bin is kept. Two messages agree on a byte about as often as their
+    shingle sets overlap.
+
+    Messages shorter than `min_length` characters get no signature, as
+    short messages repeat innocently, and only the first `max_length`
+    characters are used.
+    """
+
+    def __init__(self, num_hashes=16, bands=4, shingle_size=5, min_length=30, max_length=512):
+        self.num_hashes = num_hashes
+        self.rows = num_hashes // bands
+        self.shingle_size = shingle_size
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def signature(self, content):
+        text = NON_WORD.sub(" ", content[:self.max_length]).strip()
+        if len(text) < self.min_length:
+            return None
+
+        size = self.shingle_size
+        count = self.num_hashes
+        bins = [None] * count
+        for value in {hash(text[i:i + size]) for i in range(len(text) - size + 1)}:
+            index = value % count
+            value //= count
+            if bins[index] is None or value < bins[index]:
+                bins[index] = value
+
+        for index in range(count):
+            if bins[index] is None:
+                offset = 1
+                while bins[(index + offset) % count] is None:
+                    offset += 1
+                bins[index] = bins[(index + offset) % count] + offset
+        return bytes(value & 0xFF for value in bins)
+
+    def bands(self, signature):
+        rows = self.rows
+        return [signature[i:i + rows] for i in range(0, len(signature), rows)]
+
+    @staticmethod
+    def similarity(a, b):
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class Entry:
+    __slots__ = ("time", "author_id", "signature", "bands")
+
+    def __init__(self, time, author_id, signature, bands):
+        self.time = time
+        self.author_id = author_id
+        self.signature = signature
+        self.bands = bands
+
+
+class FingerprintStore:
+    """One guild's recent message signatures, oldest first.
+
+    Signatures are bucketed by band (locality-sensitive hashing), so only
+    messages sharing a whole band with the new one are compared. At most
+    `max_entries` messages from the last `window` seconds are kept.
+    """
+
+    # Limits the comparisons for one message, even in a flood
+    max_candidates = 256
+
+    def __init__(self, fingerprinter, max_entries=1000):
+        self.fingerprinter = fingerprinter
+        self.max_entries = max_entries
+        self.entries = deque()
+        self.buckets = [{} for _ in range(fingerprinter.num_hashes // fingerprinter.rows)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, author_id, content, now, window, similarity, limit):
+        """Store a message and return how many other authors sent a similar
+        one within the window, counting no further than `limit`."""
+        signature = self.fingerprinter.signature(content)
+        if signature is None:
+            return 0
+
+        while self.entries and (len(self.entries) >= self.max_entries or now - self.entries[0].time >= window):
+            self.evict()
+
+        bands = self.fingerprinter.bands(signature)
+        authors = set()
+        seen = set()
+        for buckets, band in zip(self.buckets, bands):
+            bucket = buckets.get(band)
+            if not bucket:
+                continue
+            # Newest first, the likeliest to be part of the same wave
+            for entry in reversed(bucket):
+                if len(seen) >= self.max_candidates or len(authors) >= limit:
+                    break
+                if id(entry) in seen or entry.author_id == author_id or entry.author_id in authors:
+                    continue
+                seen.add(id(entry))
+                if self.fingerprinter.similarity(signature, entry.signature) >= similarity:
+                    authors.add(entry.author_id)
+
+        entry = Entry(now, author_id, signature, bands)
+        self.entries.append(entry)
+        for buckets, band in zip(self.buckets, bands):
+            bucket = buckets.get(band)
+            if bucket is None:
+                # Lists, most buckets only ever hold one entry and a deque is big
+                bucket = buckets[band] = []
+            bucket.append(entry)
+        return len(authors)
+
+    def evict(self):
+        # Buckets are in insertion order too, so the entry is at their front
+        entry = self.entries.popleft()
+        for buckets, band in zip(self.buckets, entry.bands):
+            bucket = buckets[band]
+            del bucket[0]
+            if not bucket:
+                del buckets[band]
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+
+class GuildCache:
+    """Per-guild records that are loaded on first use and evicted when idle.
+
+    A guild's records ({key: value}) are read from the repository the first
+    time the guild is needed. Guilds unused for `idle_timeout` seconds are
+    dropped, and the least recently used guilds are dropped whenever more
+    than `max_records` records are held. A guild with saves still queued is
+    never dropped; `can_evict` can veto eviction for other reasons.
+    `decode` optionally turns the loaded records into another container,
+    which only has to support len(). It runs on the storage worker thread.
+    `on_evict` is called with the ID of every guild dropped from memory.
+
+    Defaults come from GUILD_CACHE_IDLE_MINUTES and GUILD_CACHE_MAX_RECORDS.
+    """
+
+    def __init__(self, repo, idle_timeout=None, max_records=None, can_evict=None, decode=None, on_evict=None):
+        if idle_timeout is None:
+            idle_timeout = int(os.getenv("GUILD_CACHE_IDLE_MINUTES", 30)) * 60
+        if max_records is None:
+            max_records = int(os.getenv("GUILD_CACHE_MAX_RECORDS", 200000))
+
+        self.repo = repo
+        self.idle_timeout = idle_timeout
+        self.max_records = max_records
+        self.can_evict = can_evict
+        self.decode = decode
+        self.on_evict = on_evict
+        self.entries = OrderedDict()  # Least recently used first
+        self.last_used = {}
+        self.loading = {}
+        self.loads = 0
+        self.evictions = 0
+        self.task = None
+
+    def get(self, guild_id):
+        """Return a loaded guild's records, or None if it isn't in memory"""
+        guild_id = str(guild_id)
+        records = self.entries.get(guild_id)
+        if records is not None:
+            self.entries.move_to_end(guild_id)
+            self.last_used[guild_id] = time.monotonic()
+        return records
+
+    async def load(self, guild_id):
+        """Return a guild's records, reading them from the database if needed"""
+        guild_id = str(guild_id)
+        records = self.get(guild_id)
+        if records is not None:
+            return records
+
+        # Concurrent first accesses share one database read
+        if guild_id not in self.loading:
+            self.loading[guild_id] = asyncio.ensure_future(self.repo.load_scope(guild_id, self.decode))
+        try:
+            records = await asyncio.shield(self.loading[guild_id])
+        finally:
+            self.loading.pop(guild_id, None)
+
+        if guild_id not in self.entries:
+            self.entries[guild_id] = records
+            self.loads += 1
+        records = self.get(guild_id)
+        self.enforce_budget()
+        return records
+
+    def evictable(self, guild_id):
+        if any(scope == guild_id for scope, _ in self.repo.pending):
+            return False
+        return self.can_evict is None or self.can_evict(guild_id)
+
+    def evict(self, guild_id):
+        del self.entries[guild_id]
+        del self.last_used[guild_id]
+        self.evictions += 1
+        if self.on_evict:
+            self.on_evict(guild_id)
+
+    def enforce_budget(self):
+        total = sum(len(records) for records in self.entries.values())
+        # Oldest first, and never the guild that was just used
+        for guild_id in list(self.entries)[:-1]:
+            if total <= self.max_records:
+                break
+            if self.evictable(guild_id):
+                total -= len(self.entries[guild_id])
+                self.evict(guild_id)
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for guild_id in list(self.entries):
+            if self.last_used[guild_id] > cutoff:
+                break
+            if self.evictable(guild_id):
+                self.evict(guild_id)
+
+    def stats(self):
+        return {
+            "guilds": len(self.entries),
+            "records": sum(len(records) for records in self.entries.values()),
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
+
+    def start(self, interval=60):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(interval))
+
+    async def run(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+            self.enforce_budget()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
@@ -0,0 +1,67 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+
+class InviteCache:
+    """Resolves invite codes to (guild_id, guild_name), fetching each code once.
+
+    Valid codes are remembered for `ttl` seconds and codes that don't
+    exist (or don't lead to a server) for `negative_ttl` seconds. Lookups
+    of a code that is already being fetched wait for that request instead
+    of starting another. At most `max_size` codes are kept, least recently
+    used first out. Other HTTP errors are raised and not cached.
+    """
+
+    def __init__(self, fetch, ttl=3600, negative_ttl=600, max_size=10000):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()  # code -> (expires, result)
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    async def resolve(self, code):
+        """(guild_id, guild_name) of an invite, or None if it is invalid"""
+        entry = self.entries.get(code)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            self.entries.move_to_end(code)
+            return entry[1]
+
+        self.misses += 1
+        if code not in self.in_flight:
+            self.in_flight[code] = asyncio.ensure_future(self.lookup(code))
+        return await asyncio.shield(self.in_flight[code])
+
+    async def lookup(self, code):
+        self.fetches += 1
+        try:
+            invite = await self.fetch(code)
+            result = (invite.guild.id, invite.guild.name) if invite.guild else None
+        except discord.NotFound:
+            result = None
+        finally:
+            self.in_flight.pop(code, None)
+
+        ttl = self.ttl if result else self.negative_ttl
+        self.entries[code] = (time.monotonic() + ttl, result)
+        self.entries.move_to_end(code)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups * 100 if lookups else 0.0,
+            "fetches": self.fetches
+        }
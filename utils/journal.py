@@ -0,0 +1,108 @@
+import os
+import threading
+
+
+class Journal:
+    """Append-only log of numeric deltas, one compact line per change.
+
+    Each line is "<seq> <scope> <key> <delta>". Sequence numbers only go up,
+    so a snapshot that records the last sequence it contains can replay the
+    tail of the journal without applying anything twice. A torn final line
+    left by a crash is dropped when the journal is opened.
+
+    truncate() may run on a worker thread while entries are appended, the
+    two only share a lock for the moment the compacted file is swapped in.
+    """
+
+    def __init__(self, path, last_seq=0):
+        self.path = path
+        self.seq = last_seq
+        self.lock = threading.Lock()
+        self.drop_torn_tail()
+        for seq, _, _, _ in self.replay():
+            self.seq = max(self.seq, seq)
+        self.file = open(path, "a")
+
+    def drop_torn_tail(self):
+        # Cut off a partial last line so new entries start on a fresh line
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                f.truncate(end)
+
+    def replay(self, after_seq=0):
+        """Yield (seq, scope, key, delta) for every entry newer than after_seq"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 4 or not line.endswith("\n"):
+                    continue
+                try:
+                    seq, delta = int(parts[0]), int(parts[3])
+                except ValueError:
+                    continue
+                if seq > after_seq:
+                    yield seq, parts[1], parts[2], delta
+
+    def append(self, scope, key, delta):
+        with self.lock:
+            self.seq += 1
+            self.file.write(f"{self.seq} {scope} {key} {delta}\n")
+            # Hand the line to the OS right away so it survives a process crash
+            self.file.flush()
+            return self.seq
+
+    def append_many(self, entries):
+        """Append (scope, key, delta) entries with a single flush"""
+        entries = list(entries)
+        with self.lock:
+            lines = []
+            for scope, key, delta in entries:
+                self.seq += 1
+                lines.append(f"{self.seq} {scope} {key} {delta}\n")
+            self.file.writelines(lines)
+            self.file.flush()
+            return self.seq
+
+    def truncate(self, upto_seq):
+        """Drop entries up to upto_seq, called once they are part of a snapshot"""
+        with self.lock:
+            if self.seq <= upto_seq:
+                self.file.seek(0)
+                self.file.truncate()
+                return
+
+        # Entries were appended while the snapshot was being written, copy
+        # those to a new file and swap it in, so a crash can't lose them
+        tmp = self.path + ".tmp"
+        with open(self.path, "rb") as f, open(tmp, "wb") as out:
+            partial = b""
+            for line in f:
+                if not line.endswith(b"\n"):
+                    partial = line  # Being appended right now
+                    break
+                parts = line.split()
+                try:
+                    if len(parts) == 4 and int(parts[0]) > upto_seq:
+                        out.write(line)
+                except ValueError:
+                    continue
+
+            with self.lock:
+                # Whatever was appended since the copy above
+                out.write(partial + f.read())
+                out.close()
+                self.file.close()
+                os.replace(tmp, self.path)
+                self.file = open(self.path, "a")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
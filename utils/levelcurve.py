@@ -0,0 +1,70 @@
+from array import array
+from bisect import bisect_right
+
+# Thresholds are stored as int64
+MAX_XP = 2 ** 63 - 1
+# Past this many levels the formula is used instead of the table
+MAX_LEVELS = 100000
+
+
+class LevelCurve:
+    """Precomputed XP thresholds of a power curve.
+
+    A member with `xp` XP is at level floor((xp / scale) ** exponent), the
+    curve the bot has always used with exponent 0.3 and scale 1. The
+    smallest XP of every level is worked out once and looked up with
+    bisect afterwards, so levels and "XP for next level" always agree and
+    no float power is computed per message. The table grows on demand
+    and stops at the last level reachable with MAX_XP XP, which steep
+    curves reach within a few dozen levels, or at MAX_LEVELS levels.
+    """
+
+    def __init__(self, exponent=0.3, scale=1, levels=200):
+        self.exponent = exponent
+        self.scale = scale
+        self.thresholds = array("q", [0])
+        self.complete = False  # The next level would need more than MAX_XP
+        self.extend(levels)
+
+    def level_at(self, xp):
+        # Float formula, only used to build the table
+        return int((xp / self.scale) ** self.exponent)
+
+    def extend(self, levels):
+        levels = min(levels, MAX_LEVELS)
+        while len(self.thresholds) <= levels and not self.complete:
+            level = len(self.thresholds)
+            estimate = self.scale * level ** (1 / self.exponent)
+            if estimate > MAX_XP:
+                self.complete = True
+                break
+            # Start from the inverse formula and correct its rounding
+            xp = max(self.thresholds[-1] + 1, int(estimate))
+            while self.level_at(xp) >= level and xp > self.thresholds[-1] + 1:
+                xp -= 1
+            while self.level_at(xp) < level:
+                xp += 1
+            if xp > MAX_XP:
+                self.complete = True
+                break
+            self.thresholds.append(xp)
+
+    def level(self, xp):
+        while xp >= self.thresholds[-1] and not self.complete and len(self.thresholds) <= MAX_LEVELS:
+            self.extend(len(self.thresholds) * 2)
+        if xp >= self.thresholds[-1] and not self.complete:
+            return max(len(self.thresholds) - 1, self.level_at(xp))
+        return bisect_right(self.thresholds, xp) - 1
+
+    def xp_for_level(self, level):
+        if level >= len(self.thresholds):
+            self.extend(level)
+        if level < len(self.thresholds):
+            return self.thresholds[level]
+        # Past the end of the table, unreachable if the table ran out of XP
+        if self.complete:
+            return MAX_XP
+        return min(MAX_XP, int(self.scale * level ** (1 / self.exponent)))
+
+    def to_dict(self):
+        return {"exponent": self.exponent, "scale": self.scale}
@@ -0,0 +1,144 @@
+from array import array
+
+FIELDS = ("xp", "level", "last_message")
+
+
+class GuildLevels:
+    """Level records of one guild stored as parallel typed columns.
+
+    User IDs, XP, levels and last message times live in `array` columns and
+    a dict maps each user ID to its row. This costs far less per user than
+    one dict per user keyed by a string ID.
+
+    `order` holds the row numbers sorted by XP (highest first, ties by user
+    ID) and is updated whenever a user's XP changes, so the top users come
+    from a slice and any user's rank from a binary search. `version` goes up
+    on every XP change.
+    """
+
+    __slots__ = ("index", "user_ids", "xp", "level", "last_message", "order", "version")
+
+    def __init__(self):
+        self.index = {}
+        self.user_ids = array("q")
+        self.xp = array("q")
+        self.level = array("q")  # Past int32 for large XP on curves with a high exponent
+        self.last_message = array("d")
+        self.order = array("i")
+        self.version = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from stored {user_id: {"xp", "level", "last_message"}} records"""
+        table = cls()
+        for user_id, data in records.items():
+            row = table.add(int(user_id))
+            table.xp[row] = data.get("xp", 0)
+            table.level[row] = data.get("level", 0)
+            table.last_message[row] = data.get("last_message", 0)
+
+        # Sort once instead of placing every row on its own
+        xp, user_ids = table.xp, table.user_ids
+        table.order = array("i", sorted(range(len(user_ids)), key=lambda row: (-xp[row], user_ids[row])))
+        return table
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        return int(user_id) in self.index
+
+    def add(self, user_id):
+        row = len(self.user_ids)
+        self.index[user_id] = row
+        self.user_ids.append(user_id)
+        self.xp.append(0)
+        self.level.append(0)
+        self.last_message.append(0)
+        self.order.insert(self.position(0, user_id), row)
+        self.version += 1
+        return row
+
+    def position(self, xp, user_id):
+        """Index in `order` where a user with this XP belongs"""
+        order, xps, user_ids = self.order, self.xp, self.user_ids
+        low, high = 0, len(order)
+        while low < high:
+            mid = (low + high) // 2
+            row = order[mid]
+            if xps[row] > xp or (xps[row] == xp and user_ids[row] < user_id):
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def set_xp(self, row, xp):
+        # Take the row out of the ranking, change it and put it back. The XP
+        # is stored first, so a value that doesn't fit leaves the ranking alone
+        user_id = self.user_ids[row]
+        index = self.position(self.xp[row], user_id) if self.order else None
+        self.xp[row] = xp
+        if index is not None:
+            del self.order[index]
+        self.order.insert(self.position(xp, user_id), row)
+        self.version += 1
+
+    def recompute_levels(self, curve):
+        """Recalculate every level from XP, returns the IDs whose level changed"""
+        changed = []
+        for row, xp in enumerate(self.xp):
+            level = curve.level(xp)
+            if self.level[row] != level:
+                self.level[row] = level
+                changed.append(self.user_ids[row])
+        return changed
+
+    def rank(self, user_id):
+        """1-based leaderboard position of a user, or None if they have no record"""
+        row = self.index.get(int(user_id))
+        if row is None:
+            return None
+        return self.position(self.xp[row], self.user_ids[row]) + 1
+
+    def top(self, count, offset=0):
+        """(user_id, record) pairs of the users ranked offset+1 to offset+count"""
+        return [(self.user_ids[row], LevelRecord(self, row)) for row in self.order[offset:offset + count]]
+
+    def get(self, user_id):
+        """Return the record for a user, creating an empty one if needed"""
+        user_id = int(user_id)
+        row = self.index.get(user_id)
+        if row is None:
+            row = self.add(user_id)
+        return LevelRecord(self, row)
+
+    def items(self):
+        for row, user_id in enumerate(self.user_ids):
+            yield user_id, LevelRecord(self, row)
+
+    def to_dict(self, user_id):
+        row = self.index[int(user_id)]
+        return {"xp": self.xp[row], "level": self.level[row], "last_message": self.last_message[row]}
+
+
+class LevelRecord:
+    """Dict-style view of one row, so callers keep using record["xp"]."""
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self.table, field)[self.row]
+
+    def __setitem__(self, field, value):
+        if field == "xp":
+            self.table.set_xp(self.row, value)
+        elif field in FIELDS:
+            getattr(self.table, field)[self.row] = value
+        else:
+            raise KeyError(field)
@@ -0,0 +1,78 @@
+import asyncio
+
+import discord
+
+
+class MutedRoles:
+    """Creates each guild's "Muted" role and denies it in every channel.
+
+    Channel overwrites are applied `concurrency` at a time; discord.py
+    waits out any 429 itself, so a small bound keeps large guilds fast
+    without tripping the rate limits. Channels that already deny the role
+    are skipped, so running it again only fixes what is missing. Only one
+    setup runs per guild at a time.
+    """
+
+    def __init__(self, concurrency=5):
+        self.concurrency = concurrency
+        self.locks = {}
+        self.created = {}  # Roles being set up in the background, by guild ID
+
+    @staticmethod
+    def needs_overwrite(channel, role):
+        overwrite = channel.overwrites_for(role)
+        return overwrite.send_messages is not False or overwrite.speak is not False
+
+    async def provision(self, guild, role=None, progress=None):
+        """Create the role if needed and apply it to every channel.
+
+        `progress` is awaited with (done, total) after each channel. Returns
+        (role, updated, failed).
+        """
+        lock = self.locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            # A role we just created may not be in guild.roles yet
+            role = role or discord.utils.get(guild.roles, name="Muted")
+            if role is None:
+                role = await guild.create_role(name="Muted", reason="Muted role setup")
+
+            channels = [channel for channel in guild.channels if self.needs_overwrite(channel, role)]
+            semaphore = asyncio.Semaphore(self.concurrency)
+            done = 0
+            failed = 0
+
+            async def apply(channel):
+                nonlocal done, failed
+                overwrite = channel.overwrites_for(role)
+                overwrite.send_messages = False
+                overwrite.speak = False
+                async with semaphore:
+                    try:
+                        await channel.set_permissions(role, overwrite=overwrite, reason="Muted role setup")
+                    except discord.HTTPException as e:
+                        print(f"Error setting Muted permissions in {channel.name}: {e}")
+                        failed += 1
+                done += 1
+                if progress:
+                    await progress(done, len(channels))
+
+            await asyncio.gather(*(apply(channel) for channel in channels))
+            return role, len(channels) - failed, failed
+
+    async def get_role(self, guild):
+        """The Muted role, right away. A missing role is created and its
+        channels are set up in the background."""
+        role = discord.utils.get(guild.roles, name="Muted")
+        if role is not None:
+            return role
+
+        lock = self.locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            # Someone else may have created it while we waited
+            role = self.created.get(guild.id) or discord.utils.get(guild.roles, name="Muted")
+            if role is None:
+                role = await guild.create_role(name="Muted", reason="Muted role setup")
+                self.created[guild.id] = role
+                task = asyncio.create_task(self.provision(guild, role))
+                task.add_done_callback(lambda _: self.created.pop(guild.id, None))
+        return role
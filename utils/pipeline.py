@@ -0,0 +1,92 @@
+import time
+
+
+class MessageContext:
+    """What the stages need to know about a message, worked out once."""
+
+    __slots__ = ("message", "guild_id", "guild_key", "author_id", "content_lower", "now", "stopped_by")
+
+    def __init__(self, message):
+        self.message = message
+        self.guild_id = message.guild.id
+        self.guild_key = str(message.guild.id)  # Storage scopes are strings
+        self.author_id = message.author.id
+        self.content_lower = message.content.lower()
+        self.now = time.monotonic()
+        self.stopped_by = None
+
+    def stop(self, stage):
+        """Skip every stage after the current one, e.g. for a deleted message"""
+        self.stopped_by = stage
+
+
+class Stage:
+    __slots__ = ("name", "func", "priority", "calls", "total_time", "max_time")
+
+    def __init__(self, name, func, priority):
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+
+class MessagePipeline:
+    """Runs every registered stage over each guild message in a fixed order.
+
+    Cogs register an async `func(ctx)` under a name; stages run from the
+    lowest priority to the highest, ties by name, so moderation can run
+    first and stop later stages with ctx.stop(). Bot messages and DMs never
+    enter the pipeline. Time spent in each stage is recorded.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.messages = 0
+        self.stopped = 0
+
+    def add_stage(self, name, func, priority):
+        self.remove_stage(name)
+        self.stages.append(Stage(name, func, priority))
+        self.stages.sort(key=lambda stage: (stage.priority, stage.name))
+
+    def remove_stage(self, name):
+        self.stages = [stage for stage in self.stages if stage.name != name]
+
+    async def process(self, message):
+        if message.guild is None or message.author.bot:
+            return
+
+        ctx = MessageContext(message)
+        self.messages += 1
+        for stage in self.stages:
+            start = time.perf_counter()
+            try:
+                await stage.func(ctx)
+            except Exception as e:
+                print(f"Error in message stage {stage.name}: {e}")
+            finally:
+                elapsed = time.perf_counter() - start
+                stage.calls += 1
+                stage.total_time += elapsed
+                stage.max_time = max(stage.max_time, elapsed)
+
+            if ctx.stopped_by is not None:
+                self.stopped += 1
+                break
+
+    def stats(self):
+        return {
+            "messages": self.messages,
+            "stopped": self.stopped,
+            "stages": [
+                {
+                    "name": stage.name,
+                    "calls": stage.calls,
+                    "avg_ms": stage.total_time / stage.calls * 1000 if stage.calls else 0.0,
+                    "max_ms": stage.max_time * 1000
+                }
+                for stage in self.stages
+            ]
+        }
@@ -0,0 +1,76 @@
+import asyncio
+
+
+class Punishment:
+    __slots__ = ("rule", "reason", "messages", "task")
+
+    def __init__(self, rule, reason):
+        self.rule = rule
+        self.reason = reason
+        self.messages = []  # Violations collapsed into this punishment
+        self.task = None
+
+
+class PunishmentRegistry:
+    """Runs at most one punishment per key at a time.
+
+    The key is (guild_id, user_id, check), so only violations of the same
+    rule are merged. While a member is being punished, and until `linger`
+    seconds pass without another violation, their further violations of
+    that rule are collapsed into the running punishment instead of
+    starting a new one. Those messages are handed to
+    `await cleanup(punishment, messages)` in batches: first everything
+    that came in while the punishment ran, then whatever came in during
+    each following `linger` seconds.
+    """
+
+    def __init__(self, cleanup, linger=5.0):
+        self.cleanup = cleanup
+        self.linger = linger
+        self.running = {}
+        self.started = 0
+        self.collapsed = 0
+
+    def collapse(self, key, message):
+        """Hand a violation to the member's running punishment, if there is one"""
+        punishment = self.running.get(key)
+        if punishment is None:
+            return False
+        punishment.messages.append(message)
+        self.collapsed += 1
+        return True
+
+    def start(self, key, rule, reason):
+        punishment = self.running[key] = Punishment(rule, reason)
+        self.started += 1
+        return punishment
+
+    def finish(self, key, punishment):
+        """Call once the punishment itself is done"""
+        punishment.task = asyncio.create_task(self.wind_down(key, punishment))
+
+    async def wind_down(self, key, punishment):
+        try:
+            while True:
+                messages, punishment.messages = punishment.messages, []
+                if messages:
+                    try:
+                        await self.cleanup(punishment, messages)
+                    except Exception as e:
+                        print(f"Error cleaning up after punishment: {e}")
+                await asyncio.sleep(self.linger)
+                if not punishment.messages:
+                    break
+        finally:
+            if self.running.get(key) is punishment:
+                del self.running[key]
+
+    def stats(self):
+        return {"running": len(self.running), "started": self.started, "collapsed": self.collapsed}
+
+    async def stop(self):
+        tasks = [punishment.task for punishment in self.running.values() if punishment.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.running.clear()
@@ -0,0 +1,90 @@
+from collections import OrderedDict, deque
+
+from utils.slidingwindow import SlidingWindow
+
+
+class Raid:
+    __slots__ = ("started", "last_join", "joins", "pending", "actioned", "failed", "locked", "task")
+
+    def __init__(self, now):
+        self.started = now
+        self.last_join = now
+        self.joins = 0
+        self.pending = []  # Members waiting for the raid action
+        self.actioned = 0
+        self.failed = 0
+        self.locked = False
+        self.task = None
+
+
+class RaidDetector:
+    """Watches each guild's join rate and keeps track of raids.
+
+    A raid starts once `max_joins` members join within `time_frame`
+    seconds, and the members whose joins set it off are part of it. It
+    lasts until end() is called. Times are time.monotonic() floats.
+
+    A join is only counted once however many times it is recorded, so
+    every listener for the same join gets the same answer while the raid
+    lasts. Rejoining is a new join and counts again.
+    """
+
+    def __init__(self, max_seen=10000):
+        self.rates = SlidingWindow()
+        self.recent = {}  # guild_id -> deque of (time, member), the latest joins
+        self.raids = {}
+        self.seen = OrderedDict()  # (guild_id, member_id, joined_at) -> Raid or None
+        self.max_seen = max_seen
+        self.detected = 0
+
+    def __contains__(self, guild_id):
+        return guild_id in self.raids
+
+    def record(self, guild_id, member, now, max_joins, time_frame):
+        """Count a join and return the guild's Raid, or None if it isn't raided"""
+        # Per join, a member who leaves and joins again is counted again
+        key = (guild_id, member.id, member.joined_at)
+        if key in self.seen:
+            raid = self.seen[key]
+            return raid if raid is not None and self.raids.get(guild_id) is raid else None
+
+        raid = self.raids.get(guild_id)
+        rate = self.rates.add((guild_id,), time_frame, now)
+        recent = self.recent.get(guild_id)
+        if recent is None or recent.maxlen != max_joins:
+            recent = self.recent[guild_id] = deque(recent or (), maxlen=max_joins)
+        while recent and now - recent[0][0] >= time_frame:
+            recent.popleft()
+
+        if raid is None and rate >= max_joins:
+            raid = self.raids[guild_id] = Raid(now)
+            self.detected += 1
+            # The joins that set it off are part of the raid
+            raid.pending.extend(joined for _, joined in recent)
+            raid.joins = len(recent)
+            recent.clear()
+
+        if raid is None:
+            recent.append((now, member))
+        else:
+            raid.last_join = now
+            raid.joins += 1
+            raid.pending.append(member)
+
+        self.seen[key] = raid
+        while len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+        return raid
+
+    def end(self, guild_id):
+        """Stop the guild's raid and return it"""
+        raid = self.raids.pop(guild_id, None)
+        # Forget the join rate too, or the next join would start a new raid
+        self.rates.tracks.pop((guild_id,), None)
+        self.recent.pop(guild_id, None)
+        for key in [key for key in self.seen if key[0] == guild_id]:
+            del self.seen[key]
+        return raid
+
+    def stats(self):
+        return {"detected": self.detected, "active": len(self.raids)}
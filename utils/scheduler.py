@@ -0,0 +1,91 @@
+import asyncio
+import heapq
+import time
+
+
+class Scheduler:
+    """Timed jobs that are stored in the database and survive restarts.
+
+    A job is a dict with a "due" time (Unix seconds, so it keeps its
+    meaning across restarts) plus whatever the handler needs, stored under
+    (scope, key). Scheduling a job under an existing key replaces it. One
+    task sleeps until the earliest job is due and calls
+    `await handler(scope, key, job)`; the job is deleted afterwards even if
+    the handler fails, so a broken job can't run forever.
+    """
+
+    def __init__(self, repo, handler, ready=None):
+        self.repo = repo
+        self.handler = handler
+        self.ready = ready
+        self.jobs = {}
+        self.heap = []  # (due, scope, key), entries for replaced jobs are skipped
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.completed = 0
+
+    def __len__(self):
+        return len(self.jobs)
+
+    async def load(self):
+        for scope, records in (await self.repo.load_all()).items():
+            for key, job in records.items():
+                self.jobs[(scope, key)] = job
+                heapq.heappush(self.heap, (job["due"], scope, key))
+
+    def schedule(self, scope, key, due, **data):
+        scope, key = str(scope), str(key)
+        job = dict(data, due=due)
+        self.jobs[(scope, key)] = job
+        self.repo.save(scope, key, job)
+        heapq.heappush(self.heap, (due, scope, key))
+        self.wakeup.set()
+
+    def cancel(self, scope, key):
+        scope, key = str(scope), str(key)
+        if self.jobs.pop((scope, key), None) is not None:
+            self.repo.remove(scope, key)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        if self.ready:
+            await self.ready()
+
+        while True:
+            self.wakeup.clear()
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                due, scope, key = heapq.heappop(self.heap)
+                job = self.jobs.get((scope, key))
+                if job is None or job["due"] != due:
+                    continue  # Cancelled or replaced
+
+                del self.jobs[(scope, key)]
+                self.repo.remove(scope, key)
+                try:
+                    await self.handler(scope, key, job)
+                    self.completed += 1
+                except Exception as e:
+                    print(f"Error running scheduled job {key}: {e}")
+
+            # Sleep until the next job, a new job may be earlier
+            delay = min(self.heap[0][0] - time.time(), 300) if self.heap else 300
+            # Not wait_for(), which swallows a cancel that lands just as the
+            # event is set and would leave stop() waiting forever
+            waiter = asyncio.ensure_future(self.wakeup.wait())
+            try:
+                await asyncio.wait([waiter], timeout=max(delay, 0))
+            finally:
+                waiter.cancel()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
@@ -0,0 +1,75 @@
+from collections import OrderedDict, deque
+
+
+class Track:
+    __slots__ = ("times", "weights", "total", "last", "window")
+
+    def __init__(self):
+        self.times = deque()
+        self.weights = deque()
+        self.total = 0
+        self.last = 0.0
+        self.window = 0.0
+
+
+class SlidingWindow:
+    """Sums weighted events per key over the last `window` seconds.
+
+    Keys are tuples of ints such as (guild_id, user_id) and times are
+    time.monotonic() floats. The window is given on every call, so each
+    guild can use its own. Events closer together than `resolution`
+    seconds share one slot, which bounds a key's memory by
+    window / resolution. A slot leaves the window as a whole, so the
+    oldest `resolution` seconds may be left out of the count.
+
+    A key whose newest event is older than its window counts nothing and
+    is dropped; past `max_keys` keys the least recently active ones are
+    dropped too.
+    """
+
+    def __init__(self, resolution=0.1, max_keys=50000):
+        self.resolution = resolution
+        self.max_keys = max_keys
+        self.tracks = OrderedDict()  # Least recently active first
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def add(self, key, window, now, weight=1):
+        """Record an event and return the total inside the window, this event included"""
+        track = self.tracks.get(key)
+        if track is None:
+            track = self.tracks[key] = Track()
+        else:
+            self.tracks.move_to_end(key)
+        track.last = now
+        track.window = window
+
+        times, weights = track.times, track.weights
+        cutoff = now - window
+        while times and times[0] <= cutoff:
+            times.popleft()
+            track.total -= weights.popleft()
+
+        if times and now - times[-1] < self.resolution:
+            weights[-1] += weight
+        else:
+            times.append(now)
+            weights.append(weight)
+        track.total += weight
+
+        self.prune(now)
+        return track.total
+
+    def prune(self, now):
+        # Oldest activity first, so stop at the first key that's still live
+        while self.tracks:
+            key, track = next(iter(self.tracks.items()))
+            if len(self.tracks) <= self.max_keys and now - track.last < track.window:
+                break
+            del self.tracks[key]
+            self.evictions += 1
+
+    def stats(self):
+        return {"keys": len(self.tracks), "evictions": self.evictions}
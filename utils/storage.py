@@ -0,0 +1,285 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Marks a queued record as deleted
+DELETED = object()
+
+
+class Storage:
+    """Shared SQLite database that every cog persists its data through.
+
+    Records live in a single table keyed by (namespace, scope, key). The
+    namespace identifies the cog ("levels", "automod", ...), the scope is
+    usually a guild ID and the key identifies one record inside it. Every
+    write touches only the rows that changed.
+
+    All database work runs on a single worker thread so the event loop never
+    waits on disk.
+    """
+
+    def __init__(self, path="data/bot.db"):
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "namespace TEXT NOT NULL, "
+            "scope TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, scope, key)"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL"
+            ")"
+        )
+        self.conn.commit()
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self.repositories = {}
+
+        # Save latency, measured from the moment a write is handed to the worker
+        self.write_count = 0
+        self.write_time = 0.0
+        self.max_write_time = 0.0
+        self.last_write_time = 0.0
+
+    async def run(self, func, *args):
+        """Run a blocking database call on the worker thread"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def write(self, func, *args):
+        """Like run(), but records how long the write took"""
+        start = time.perf_counter()
+        try:
+            return await self.run(func, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.write_count += 1
+            self.write_time += elapsed
+            self.last_write_time = elapsed
+            self.max_write_time = max(self.max_write_time, elapsed)
+
+    def latency_stats(self):
+        return {
+            "writes": self.write_count,
+            "avg_ms": self.write_time / self.write_count * 1000 if self.write_count else 0.0,
+            "max_ms": self.max_write_time * 1000,
+            "last_ms": self.last_write_time * 1000,
+            "pending": sum(len(repo.pending) for repo in self.repositories.values())
+        }
+
+    async def get_meta(self, key, default=None):
+        def fetch():
+            return self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+
+        row = await self.run(fetch)
+        return json.loads(row[0]) if row else default
+
+    def repository(self, namespace):
+        if namespace not in self.repositories:
+            self.repositories[namespace] = Repository(self, namespace)
+        return self.repositories[namespace]
+
+    async def close(self):
+        # Let queued saves finish before the connection goes away
+        for repo in self.repositories.values():
+            await repo.drain()
+        self.executor.shutdown(wait=True)
+        self.conn.close()
+
+
+class Repository:
+    """Per-cog view of the shared storage.
+
+    Reads and batch writes are awaited. save() and remove() queue a single
+    record and return right away; repeated saves of the same record made
+    before the queue is written collapse into one write. A batch that fails
+    to write is queued again and retried after `retry_delay` seconds.
+    """
+
+    retry_delay = 5
+
+    def __init__(self, storage, namespace):
+        self.storage = storage
+        self.namespace = namespace
+        self.pending = {}
+        self.flushing = None
+
+    @staticmethod
+    def encode(value):
+        return json.dumps(value, separators=(",", ":"))
+
+    async def is_empty(self):
+        def fetch():
+            return self.storage.conn.execute(
+                "SELECT 1 FROM records WHERE namespace = ? LIMIT 1",
+                (self.namespace,)
+            ).fetchone()
+
+        return await self.storage.run(fetch) is None
+
+    async def get(self, scope, key):
+        def fetch():
+            return self.storage.conn.execute(
+                "SELECT value FROM records WHERE namespace = ? AND scope = ? AND key = ?",
+                (self.namespace, str(scope), str(key))
+            ).fetchone()
+
+        row = await self.storage.run(fetch)
+        return json.loads(row[0]) if row else None
+
+    async def load_scope(self, scope, decode=None):
+        """Return every record in a scope as {key: value}.
+
+        `decode` is called with those records on the worker thread and its
+        result returned instead, for conversions too slow for the event loop.
+        """
+        def fetch():
+            rows = self.storage.conn.execute(
+                "SELECT key, value FROM records WHERE namespace = ? AND scope = ?",
+                (self.namespace, str(scope))
+            )
+            records = {key: json.loads(value) for key, value in rows}
+            return decode(records) if decode else records
+
+        return await self.storage.run(fetch)
+
+    async def load_all(self):
+        """Return every record in the namespace as {scope: {key: value}}"""
+        def fetch():
+            data = {}
+            rows = self.storage.conn.execute(
+                "SELECT scope, key, value FROM records WHERE namespace = ?",
+                (self.namespace,)
+            )
+            for scope, key, value in rows:
+                data.setdefault(scope, {})[key] = json.loads(value)
+            return data
+
+        return await self.storage.run(fetch)
+
+    def write_rows(self, upserts, deletes, meta):
+        # Runs on the worker thread, everything is committed together
+        conn = self.storage.conn
+        with conn:
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO records (namespace, scope, key, value) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, scope, key) DO UPDATE SET value = excluded.value",
+                    upserts
+                )
+            if deletes:
+                conn.executemany(
+                    "DELETE FROM records WHERE namespace = ? AND scope = ? AND key = ?",
+                    deletes
+                )
+            if meta:
+                conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                    meta
+                )
+
+    async def upsert_many(self, rows, meta=None):
+        """Insert or replace (scope, key, value) rows in one transaction.
+
+        `meta` is an optional {key: value} dict committed in the same
+        transaction, for bookkeeping that must stay in step with the rows.
+        Values are encoded before this returns control to the loop, so the
+        caller may keep changing them while the write is in flight.
+        """
+        upserts = [(self.namespace, str(scope), str(key), self.encode(value)) for scope, key, value in rows]
+        meta_rows = [(key, self.encode(value)) for key, value in meta.items()] if meta else None
+        await self.storage.write(self.write_rows, upserts, None, meta_rows)
+
+    async def upsert(self, scope, key, value):
+        await self.upsert_many([(scope, key, value)])
+
+    async def delete_scope(self, scope):
+        def delete():
+            with self.storage.conn:
+                self.storage.conn.execute(
+                    "DELETE FROM records WHERE namespace = ? AND scope = ?",
+                    (self.namespace, str(scope))
+                )
+
+        await self.storage.write(delete)
+
+    def save(self, scope, key, value):
+        """Queue a write of one record"""
+        self.pending[(str(scope), str(key))] = value
+        self.schedule_flush()
+
+    def remove(self, scope, key):
+        """Queue the deletion of one record"""
+        self.pending[(str(scope), str(key))] = DELETED
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flushing is None:
+            self.flushing = asyncio.ensure_future(self.write_pending())
+
+    async def write_pending(self):
+        try:
+            while self.pending:
+                batch, self.pending = self.pending, {}
+                upserts = []
+                deletes = []
+                for (scope, key), value in batch.items():
+                    if value is DELETED:
+                        deletes.append((self.namespace, scope, key))
+                    else:
+                        upserts.append((self.namespace, scope, key, self.encode(value)))
+
+                try:
+                    await self.storage.write(self.write_rows, upserts, deletes, None)
+                except Exception as e:
+                    print(f"Error saving {self.namespace} data: {e}")
+                    # Queue the batch again, saves made since then are newer and win
+                    for record, value in batch.items():
+                        self.pending.setdefault(record, value)
+                    asyncio.get_running_loop().call_later(self.retry_delay, self.schedule_flush)
+                    break
+        finally:
+            self.flushing = None
+
+    async def drain(self):
+        """Wait until every queued save has been written"""
+        while self.flushing is not None:
+            await self.flushing
+
+    async def import_legacy(self, path, to_rows):
+        """One-time migration of a cog's old JSON file into the database.
+
+        `to_rows` turns the parsed JSON into (scope, key, value) rows. The file
+        is renamed afterwards so the import never runs twice. A file that can't
+        be parsed is left untouched so no data is lost.
+        """
+        if not os.path.exists(path) or not await self.is_empty():
+            return
+
+        def read():
+            with open(path, "r") as f:
+                return json.load(f)
+
+        try:
+            data = await self.storage.run(read)
+        except json.JSONDecodeError as e:
+            print(f"Error migrating {path}: {e}")
+            return
+
+        await self.upsert_many(to_rows(data))
+        os.replace(path, path + ".migrated")
@@ -0,0 +1,42 @@
+import re
+
+
+class WordMatcher:
+    """A guild's filtered words compiled into a single regex.
+
+    The words are arranged as a trie and turned into nested groups, so
+    words sharing a prefix share the work of matching it and a message is
+    checked in one pass however long the list is. Each word only matches
+    as a whole word (\\b on both sides), like the old per-word search.
+    """
+
+    def __init__(self, words):
+        self.words = {word.lower(): word for word in words if word}
+        self.pattern = None
+        if self.words:
+            trie = {}
+            for word in self.words:
+                node = trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                node[""] = True
+            self.pattern = re.compile(r"\b" + self.trie_pattern(trie) + r"\b")
+
+    @classmethod
+    def trie_pattern(cls, node):
+        branches = [re.escape(char) + cls.trie_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ends here, the longer words are optional
+        if "" in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    def search(self, content):
+        """Return the first filtered word found in lowercased content, or None"""
+        if self.pattern is None:
+            return None
+        match = self.pattern.search(content)
+        return self.words[match.group()] if match else None
@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+
+
+class WriteBehind:
+    """Buffers dirty records and writes them to a repository in batches.
+
+    Callers mark (scope, key) pairs as dirty; the current value is looked up
+    with `fetch` when the batch is written. A batch is written every
+    `interval` seconds, or sooner once `max_pending` records are dirty, but
+    never more often than once every `min_gap` seconds. Disk writes stay
+    bounded no matter how many records change in between.
+
+    `meta` may return extra bookkeeping to commit with each batch and
+    `on_flushed` is called with it once the batch has been committed. If
+    it returns an awaitable, e.g. work handed to the storage worker, the
+    flush waits for it.
+    """
+
+    def __init__(self, repo, fetch, interval=10, max_pending=500, min_gap=1, meta=None, on_flushed=None):
+        self.repo = repo
+        self.fetch = fetch
+        self.meta = meta
+        self.on_flushed = on_flushed
+        self.interval = interval
+        self.max_pending = max_pending
+        self.min_gap = min_gap
+        self.dirty = set()
+        self.writing = set()  # Records in the batch being written
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def mark(self, scope, key):
+        self.dirty.add((scope, key))
+        if len(self.dirty) >= self.max_pending:
+            self.wakeup.set()
+
+    def request_flush(self):
+        """Ask the background task to write the dirty records now"""
+        self.wakeup.set()
+
+    def is_dirty(self, scope):
+        # A batch in flight counts too, it goes back to dirty if it fails
+        return any(dirty_scope == scope for records in (self.dirty, self.writing) for dirty_scope, _ in records)
+
+    async def flush(self):
+        """Write every dirty record now, returns the number of rows written"""
+        if not self.dirty:
+            return 0
+
+        dirty, self.dirty = self.dirty, set()
+        self.writing = dirty
+        meta = self.meta() if self.meta else None
+        try:
+            await self.repo.upsert_many(
+                [(scope, key, self.fetch(scope, key)) for scope, key in dirty],
+                meta
+            )
+        except BaseException:
+            # Keep the records dirty so the next flush retries them
+            self.dirty |= dirty
+            raise
+        finally:
+            self.writing = set()
+
+        if self.on_flushed:
+            result = self.on_flushed(meta)
+            if inspect.isawaitable(result):
+                await result
+        return len(dirty)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            # Not wait_for(), which swallows a cancel that lands just as the
+            # event is set and would leave stop() waiting forever
+            waiter = asyncio.ensure_future(self.wakeup.wait())
+            try:
+                await asyncio.wait([waiter], timeout=self.interval)
+            finally:
+                waiter.cancel()
+            self.wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error writing {self.repo.namespace} data: {e}")
+
+            await asyncio.sleep(self.min_gap)
+
+    async def stop(self):
+        """Stop the background task and write whatever is still pending"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
@@ -0,0 +1,68 @@
+import csv
+import json
+
+from utils.levelcurve import MAX_XP
+
+# Highest XP an import may set, far enough below MAX_XP for years of awards
+MAX_IMPORT_XP = 2 ** 53
+
+
+def write_table(path, format, rows):
+    """Write (user_id, xp, level) rows to a CSV or NDJSON file, one row at a time"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if format == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["user_id", "xp", "level"])
+            writer.writerows(rows)
+        else:
+            for user_id, xp, level in rows:
+                f.write(json.dumps({"user_id": str(user_id), "xp": xp, "level": level}) + "\n")
+
+
+class TableReader:
+    """Reads (user_id, xp) pairs back from an exported file in chunks.
+
+    The format is detected from the first line. Rows that can't be parsed,
+    whose user ID doesn't fit the int64 storage or whose XP is above
+    MAX_IMPORT_XP, are skipped and counted in `skipped`.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "r", newline="", encoding="utf-8-sig")
+        self.ndjson = self.file.readline().lstrip().startswith("{")
+        self.file.seek(0)
+        self.rows = self.file if self.ndjson else csv.DictReader(self.file)
+        self.skipped = 0
+
+    def read(self, count):
+        chunk = []
+        while True:
+            try:
+                record = next(self.rows)
+            except StopIteration:
+                break
+            except csv.Error:
+                # A broken row, e.g. a field over the csv module's size limit
+                self.skipped += 1
+                continue
+
+            try:
+                if self.ndjson:
+                    if not record.strip():
+                        continue
+                    record = json.loads(record)
+                user_id = int(record["user_id"])
+                xp = int(record["xp"])
+                if not 0 < user_id <= MAX_XP or not 0 <= xp <= MAX_IMPORT_XP:
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                self.skipped += 1
+                continue
+
+            chunk.append((user_id, xp))
+            if len(chunk) >= count:
+                break
+        return chunk
+
+    def close(self):
+        self.file.close()